@@ -4,9 +4,82 @@
 用于格式化地缘政治分析报告的标准输出
 """
 
+import io
 import json
 from datetime import datetime
 
+# 紧急度/风险等级 0-3 对应的图标，避免逐行拼接
+URGENCY_BARS = tuple("🔴" * i + "⚪" * (3 - i) for i in range(4))
+RISK_BARS = tuple("🔴" * i for i in range(4))
+
+
+def urgency_bar(level: int) -> str:
+    """紧急度图标；0-3 查表，超出范围时按原样逐个拼接（如 5 级显示 5 个 🔴）"""
+    if 0 <= level <= 3:
+        return URGENCY_BARS[level]
+    return "🔴" * level + "⚪" * (3 - level)
+
+
+def risk_bar(level: int) -> str:
+    """风险图标；0-3 查表，超出范围时按原样逐个拼接"""
+    if 0 <= level <= 3:
+        return RISK_BARS[level]
+    return "🔴" * level
+
+# 报告中固定不变的片段
+REPORT_HEADER_TMPL = (
+    "# 全球地缘局势推演与A股事件驱动报告\n"
+    "\n"
+    "**报告日期**：{date}\n"
+    "**生成时间**：{time}\n"
+    "\n"
+    "---\n"
+    "\n"
+    "## 🌍 全球地缘风暴眼 (Heatmap)\n"
+    "\n"
+    "**局势综述**：{summary}\n"
+    "\n"
+    "### 今日焦点\n"
+    "\n"
+)
+HOTSPOT_TABLE_HEAD = (
+    "| 排名 | 事件 | 紧急度 | 影响板块 |\n"
+    "|:---:|------|:---:|:--------:|\n"
+)
+REGIONS_HEAD = "\n---\n\n## 🗺️ 全球区域深度扫描与局势推演\n\n"
+MAPPING_HEAD = "## 🔗 传导链条与金融映射\n\n"
+COMMODITY_TABLE_HEAD = (
+    "### 大宗商品\n"
+    "\n"
+    "| 品种 | 驱动因素 | 预判 |\n"
+    "|-----|---------|:----:|\n"
+)
+STRATEGY_HEAD = "## 📈 A股事件驱动与多空策略\n\n"
+LONG_SECTORS_HEAD = "### 🟢 受益板块（做多逻辑）\n\n"
+LONG_STOCK_TABLE_HEAD = (
+    "| 代码 | 名称 | 逻辑 |\n"
+    "|:---:|-----|------|\n"
+)
+SHORT_SECTORS_HEAD = "### 🔴 受损板块（规避风险）\n\n"
+SHORT_STOCK_TABLE_HEAD = (
+    "| 代码 | 名称 | 风险 |\n"
+    "|:---:|-----|:----:|\n"
+)
+REPORT_FOOTER = (
+    "---\n"
+    "\n"
+    "**免责声明**：本报告仅供研究参考，不构成投资建议。\n"
+    "\n"
+    "*报告由 地缘驱动策略系统 生成*"
+)
+
+REGION_EMOJIS = {
+    "china": "🇨🇳",
+    "americas": "🌎",
+    "europe": "❄️",
+    "middle_east": "🛢️"
+}
+
 def format_event_report(
     date: str = None,
     heatmap_summary: str = "",
@@ -29,8 +102,10 @@ def format_event_report(
         short_sectors: 做空/规避板块列表
     """
     
+    now = datetime.now()
     if date is None:
-        date = datetime.now().strftime("%Y-%m-%d")
+        date = now.strftime("%Y-%m-%d")
+    time_str = now.strftime("%H:%M:%S")
     
     if hotspots is None:
         hotspots = []
@@ -41,125 +116,109 @@ def format_event_report(
     if short_sectors is None:
         short_sectors = []
     
-    report_lines = [
-        f"# 全球地缘局势推演与A股事件驱动报告",
-        "",
-        f"**报告日期**：{date}",
-        f"**生成时间**：{datetime.now().strftime('%H:%M:%S')}",
-        "",
-        "---",
-        "",
-        "## 🌍 全球地缘风暴眼 (Heatmap)",
-        "",
-        f"**局势综述**：{heatmap_summary}",
-        "",
-        "### 今日焦点",
-        "",
-    ]
+    buf = io.StringIO()
+    write = buf.write
+    write(REPORT_HEADER_TMPL.format(date=date, time=time_str, summary=heatmap_summary))
     
     # 热点事件表格
-    report_lines.append("| 排名 | 事件 | 紧急度 | 影响板块 |")
-    report_lines.append("|:---:|------|:---:|:--------:|")
+    write(HOTSPOT_TABLE_HEAD)
     for i, hotspot in enumerate(hotspots[:5], 1):
-        urgency = "🔴" * hotspot.get("urgency", 1) + "⚪" * (3 - hotspot.get("urgency", 1))
-        report_lines.append(f"| {i} | {hotspot.get('title', 'N/A')} | {urgency} | {hotspot.get('sector', 'N/A')} |")
-    
-    report_lines.extend(["", "---", ""])
+        hg = hotspot.get
+        urgency = urgency_bar(hg("urgency", 1))
+        write(f"| {i} | {hg('title', 'N/A')} | {urgency} | {hg('sector', 'N/A')} |\n")
     
     # 各区域详情
-    report_lines.append("## 🗺️ 全球区域深度扫描与局势推演")
-    report_lines.append("")
-    
-    region_emojis = {
-        "china": "🇨🇳",
-        "americas": "🌎", 
-        "europe": "❄️",
-        "middle_east": "🛢️"
-    }
+    write(REGIONS_HEAD)
     
     for region_key, region_data in regions.items():
-        emoji = region_emojis.get(region_key, "📍")
-        report_lines.append(f"### {emoji} {region_data.get('name', region_key)}")
-        report_lines.append("")
+        events = region_data.get("events")
+        if not events:
+            continue
+        emoji = REGION_EMOJIS.get(region_key, "📍")
+        write(f"### {emoji} {region_data.get('name', region_key)}\n")
+        write("\n")
         
-        for event in region_data.get("events", []):
-            report_lines.append(f"#### {event.get('title', '未命名事件')}")
-            report_lines.append(f"- **时间**：{event.get('time', 'N/A')}")
-            report_lines.append(f"- **地点**：{event.get('location', 'N/A')}")
-            report_lines.append(f"- **关键人物**：{event.get('actors', 'N/A')}")
-            report_lines.append(f"- **具体内容**：{event.get('content', 'N/A')}")
-            report_lines.append(f"- **信息来源**：{event.get('source', 'N/A')}")
-            report_lines.append(f"- **费曼解读**：{event.get('simple_explain', 'N/A')}")
-            report_lines.append("")
+        for event in events:
+            g = event.get
+            title = g('title', '未命名事件')
+            time = g('time', 'N/A')
+            location = g('location', 'N/A')
+            actors = g('actors', 'N/A')
+            content = g('content', 'N/A')
+            source = g('source', 'N/A')
+            simple_explain = g('simple_explain', 'N/A')
+            write(
+                f"#### {title}\n"
+                f"- **时间**：{time}\n"
+                f"- **地点**：{location}\n"
+                f"- **关键人物**：{actors}\n"
+                f"- **具体内容**：{content}\n"
+                f"- **信息来源**：{source}\n"
+                f"- **费曼解读**：{simple_explain}\n"
+                "\n"
+            )
             
-            if "forecast" in event:
-                report_lines.append("**📊 沙盘推演**")
-                for scenario, prob in event["forecast"].items():
-                    report_lines.append(f"- {scenario}：{prob}")
-                report_lines.append("")
+            forecast = g("forecast")
+            if forecast is not None:
+                write("**📊 沙盘推演**\n")
+                for scenario, prob in forecast.items():
+                    write(f"- {scenario}：{prob}\n")
+                write("\n")
         
-        report_lines.append("---")
-        report_lines.append("")
+        write("---\n")
+        write("\n")
     
     # 金融映射
-    report_lines.append("## 🔗 传导链条与金融映射")
-    report_lines.append("")
+    write(MAPPING_HEAD)
     
     # 大宗商品
     if commodities:
-        report_lines.append("### 大宗商品")
-        report_lines.append("")
-        report_lines.append("| 品种 | 驱动因素 | 预判 |")
-        report_lines.append("|-----|---------|:----:|")
+        write(COMMODITY_TABLE_HEAD)
         for commodity, data in commodities.items():
-            direction = "📈" if data.get("direction") == "up" else "📉" if data.get("direction") == "down" else "➡️"
-            report_lines.append(f"| {commodity} | {data.get('driver', 'N/A')} | {direction} |")
-        report_lines.append("")
+            trend = data.get("direction")
+            direction = "📈" if trend == "up" else "📉" if trend == "down" else "➡️"
+            write(f"| {commodity} | {data.get('driver', 'N/A')} | {direction} |\n")
+        write("\n")
     
     # A股策略
-    report_lines.append("## 📈 A股事件驱动与多空策略")
-    report_lines.append("")
+    write(STRATEGY_HEAD)
     
     # 做多板块
     if long_sectors:
-        report_lines.append("### 🟢 受益板块（做多逻辑）")
-        report_lines.append("")
+        write(LONG_SECTORS_HEAD)
         for sector in long_sectors:
-            report_lines.append(f"#### {sector.get('name', '未命名板块')}")
-            report_lines.append(f"**核心逻辑**：{sector.get('logic', 'N/A')}")
-            report_lines.append("")
-            if "stocks" in sector:
-                report_lines.append("| 代码 | 名称 | 逻辑 |")
-                report_lines.append("|:---:|-----|------|")
-                for stock in sector["stocks"]:
-                    report_lines.append(f"| {stock.get('code', 'N/A')} | {stock.get('name', 'N/A')} | {stock.get('logic', 'N/A')} |")
-                report_lines.append("")
+            sg = sector.get
+            write(f"#### {sg('name', '未命名板块')}\n")
+            write(f"**核心逻辑**：{sg('logic', 'N/A')}\n")
+            write("\n")
+            stocks = sg("stocks")
+            if stocks is not None:
+                write(LONG_STOCK_TABLE_HEAD)
+                for stock in stocks:
+                    stg = stock.get
+                    write(f"| {stg('code', 'N/A')} | {stg('name', 'N/A')} | {stg('logic', 'N/A')} |\n")
+                write("\n")
     
     # 规避板块
     if short_sectors:
-        report_lines.append("### 🔴 受损板块（规避风险）")
-        report_lines.append("")
+        write(SHORT_SECTORS_HEAD)
         for sector in short_sectors:
-            report_lines.append(f"#### {sector.get('name', '未命名板块')}")
-            report_lines.append(f"**受损逻辑**：{sector.get('logic', 'N/A')}")
-            report_lines.append("")
-            if "stocks" in sector:
-                report_lines.append("| 代码 | 名称 | 风险 |")
-                report_lines.append("|:---:|-----|:----:|")
-                for stock in sector["stocks"]:
-                    risk = "🔴" * stock.get("risk", 1)
-                    report_lines.append(f"| {stock.get('code', 'N/A')} | {stock.get('name', 'N/A')} | {risk} |")
-                report_lines.append("")
-    
-    report_lines.extend([
-        "---",
-        "",
-        "**免责声明**：本报告仅供研究参考，不构成投资建议。",
-        "",
-        "*报告由 地缘驱动策略系统 生成*"
-    ])
-    
-    return "\n".join(report_lines)
+            sg = sector.get
+            write(f"#### {sg('name', '未命名板块')}\n")
+            write(f"**受损逻辑**：{sg('logic', 'N/A')}\n")
+            write("\n")
+            stocks = sg("stocks")
+            if stocks is not None:
+                write(SHORT_STOCK_TABLE_HEAD)
+                for stock in stocks:
+                    stg = stock.get
+                    risk = risk_bar(stg("risk", 1))
+                    write(f"| {stg('code', 'N/A')} | {stg('name', 'N/A')} | {risk} |\n")
+                write("\n")
+    
+    write(REPORT_FOOTER)
+    
+    return buf.getvalue()
 
 
 if __name__ == "__main__":
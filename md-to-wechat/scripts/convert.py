@@ -9,21 +9,34 @@ Usage:
     python convert.py input.md [-o output.html] [--theme blue|green|dark|warm]
 
 Dependencies:
-    pip install markdown pygments beautifulsoup4
+    pip install markdown pygments
 """
 
 import argparse
+import functools
+import os
 import re
+import string
 import sys
+import xml.etree.ElementTree as etree
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from html import escape, unescape
 from pathlib import Path
+from types import MappingProxyType
+from typing import TextIO
 
 try:
     import markdown
+    from markdown.extensions import Extension
+    from markdown.extensions import codehilite as _codehilite
     from markdown.extensions.codehilite import CodeHiliteExtension
     from markdown.extensions.fenced_code import FencedCodeExtension
     from markdown.extensions.tables import TableExtension
     from markdown.extensions.toc import TocExtension
     from markdown.extensions.footnotes import FootnoteExtension
+    from markdown.treeprocessors import Treeprocessor
+    from markdown.util import HTML_PLACEHOLDER_RE
 except ImportError:
     print("Error: 'markdown' package not installed. Run: pip install markdown")
     sys.exit(1)
@@ -34,11 +47,31 @@ except ImportError:
     print("Error: 'pygments' package not installed. Run: pip install pygments")
     sys.exit(1)
 
-try:
-    from bs4 import BeautifulSoup, Tag
-except ImportError:
-    print("Error: 'beautifulsoup4' package not installed. Run: pip install beautifulsoup4")
-    sys.exit(1)
+
+def _memoize_pygments(factory):
+    """Memoize a Pygments lexer/formatter factory on its arguments.
+
+    Calls with unhashable options (e.g. ``hl_lines`` lists) bypass the cache.
+    """
+    cache = {}
+
+    @functools.wraps(factory)
+    def cached(*args, **options):
+        try:
+            key = (args, frozenset(options.items()))
+            obj = cache.get(key)
+        except TypeError:
+            return factory(*args, **options)
+        if obj is None:
+            obj = cache[key] = factory(*args, **options)
+        return obj
+
+    return cached
+
+
+# CodeHilite resolves a lexer for every fenced block; it is a pure function
+# of its options, so reuse lexers across blocks/files.
+_codehilite.get_lexer_by_name = _memoize_pygments(_codehilite.get_lexer_by_name)
 
 
 # ──────────────────────────────────────────────
@@ -141,10 +174,9 @@ THEMES = {
 # Style Generator
 # ──────────────────────────────────────────────
 
-def build_styles(theme_name: str = "blue") -> dict:
-    """Build a complete inline-styles dictionary from a theme."""
-    t = THEMES.get(theme_name, THEMES["blue"])
-    return {
+def _compute_styles(t: dict) -> MappingProxyType:
+    """Build a complete inline-styles dictionary from a theme definition."""
+    styles = {
         "container": (
             f"max-width: 100%;"
             f"font-family: {t['font_body']};"
@@ -340,12 +372,38 @@ def build_styles(theme_name: str = "blue") -> dict:
             f"font-weight: bold;"
         ),
     }
+    # Prebuilt "traffic light" dots shared by every code block header
+    styles["code_block_dots_html"] = (
+        f'<div style="{styles["code_block_dots"]}">'
+        + "".join(
+            f'<span style="{styles["code_block_dot"]} background: {color};"></span>'
+            for color in ("#ff5f57", "#febc2e", "#28c840")
+        )
+        + "</div>"
+    )
+    # Theme-independent values (em, ul, ol, ...) become one shared object
+    return MappingProxyType({k: sys.intern(v) for k, v in styles.items()})
+
+
+# Style strings depend only on the theme, so every theme's table is built
+# once at import and shared (read-only) by all callers.
+_STYLES = {name: _compute_styles(t) for name, t in THEMES.items()}
+
+
+def build_styles(theme_name: str = "blue") -> MappingProxyType:
+    """Return the precomputed inline-styles mapping for a theme."""
+    return _STYLES.get(theme_name, _STYLES["blue"])
 
 
 # ──────────────────────────────────────────────
 # Markdown Pre-processing
 # ──────────────────────────────────────────────
 
+_FM_LINE_RE = re.compile(r"^([^:\n]*):(.*)$", re.MULTILINE)
+_TASK_DONE_RE = re.compile(r"^(\s*[-*])\s*\[x\]\s+(.+)$", re.MULTILINE)
+_TASK_TODO_RE = re.compile(r"^(\s*[-*])\s*\[ \]\s+(.+)$", re.MULTILINE)
+_FENCE_LANG_RE = re.compile(r"^```(\w+)\s*$", re.MULTILINE)
+
 def strip_frontmatter(md_text: str) -> tuple[str, dict]:
     """Remove YAML frontmatter from markdown and return (content, metadata).
 
@@ -358,232 +416,303 @@ def strip_frontmatter(md_text: str) -> tuple[str, dict]:
         if len(parts) >= 3:
             # parts[0] is empty (before first ---), parts[1] is frontmatter, parts[2] is content
             fm_text = parts[1].strip()
-            for line in fm_text.split("\n"):
-                line = line.strip()
-                if ":" in line:
-                    key, _, value = line.partition(":")
-                    metadata[key.strip()] = value.strip()
+            for m in _FM_LINE_RE.finditer(fm_text):
+                metadata[m.group(1).strip()] = m.group(2).strip()
             md_text = parts[2].strip()
     return md_text, metadata
 
 
 def preprocess_markdown(md_text: str) -> str:
     """Pre-process markdown for better compatibility."""
+    # Normalize CRLF so the line-anchored patterns below never capture "\r"
+    md_text = md_text.replace("\r\n", "\n")
+
     # Strip frontmatter if present
     md_text, _ = strip_frontmatter(md_text)
 
     # Convert task lists: - [ ] and - [x]
-    md_text = re.sub(
-        r"^(\s*[-*])\s*\[x\]\s+(.+)$",
-        r'\1 <span class="task-done">✅ \2</span>',
-        md_text, flags=re.MULTILINE
-    )
-    md_text = re.sub(
-        r"^(\s*[-*])\s*\[ \]\s+(.+)$",
-        r"\1 ⬜ \2",
-        md_text, flags=re.MULTILINE
-    )
+    md_text = _TASK_DONE_RE.sub(r'\1 <span class="task-done">✅ \2</span>', md_text)
+    md_text = _TASK_TODO_RE.sub(r"\1 ⬜ \2", md_text)
     return md_text
 
 
 # ──────────────────────────────────────────────
-# HTML Post-processing with BeautifulSoup
+# Inline Styling (Markdown tree + code blocks)
 # ──────────────────────────────────────────────
 
-def apply_styles(html: str, styles: dict, theme: dict) -> str:
-    """Apply inline styles to all HTML elements using BeautifulSoup."""
-    soup = BeautifulSoup(html, "html.parser")
+# Tags whose inline style is simply styles[tag_name]
+SIMPLE_STYLE_TAGS = frozenset({
+    "h1", "h2", "h3", "h4", "strong", "em", "del",
+    "ul", "ol", "li", "blockquote", "hr",
+})
 
-    # --- Headings ---
-    for tag_name in ["h1", "h2", "h3", "h4"]:
-        for tag in soup.find_all(tag_name):
-            tag["style"] = styles[tag_name]
+CODE_PRE_STYLE = "margin: 0; padding: 0; background: transparent; overflow: visible;"
 
-    # --- Paragraphs ---
-    for p in soup.find_all("p"):
-        # Paragraphs inside blockquotes get different styles
-        if p.parent and p.parent.name == "blockquote":
-            p["style"] = styles["blockquote_p"]
-        else:
-            p["style"] = styles["p"]
-
-    # --- Inline formatting ---
-    for strong in soup.find_all("strong"):
-        strong["style"] = styles["strong"]
-    for em in soup.find_all("em"):
-        em["style"] = styles["em"]
-    for del_tag in soup.find_all("del"):
-        del_tag["style"] = styles["del"]
-
-    # --- Links ---
-    for a in soup.find_all("a"):
-        # Skip footnote back-references
-        cls = a.get("class", [])
-        if "footnote-backref" in cls:
-            a["style"] = styles["footnote_ref"]
-        elif "footnote-ref" in cls:
-            a["style"] = styles["footnote_ref"]
-        else:
-            a["style"] = styles["a"]
-
-    # --- Lists ---
-    for ul in soup.find_all("ul"):
-        ul["style"] = styles["ul"]
-    for ol in soup.find_all("ol"):
-        ol["style"] = styles["ol"]
-    for li in soup.find_all("li"):
-        li["style"] = styles["li"]
-
-    # --- Blockquotes ---
-    for bq in soup.find_all("blockquote"):
-        bq["style"] = styles["blockquote"]
-
-    # --- Code blocks (codehilite) ---
-    for div in soup.find_all("div", class_="codehilite"):
-        # Extract language from class if present
-        lang = ""
-        pre = div.find("pre")
-        if pre:
-            # Try to detect language from span classes
-            first_span = pre.find("span")
-            # Try to get lang from codehilite metadata
-            classes = div.get("class", [])
-            for cls in classes:
-                if cls.startswith("language-"):
-                    lang = cls.replace("language-", "")
-
-        # If no language found, try to detect from code tag
-        if not lang:
-            code_tag = div.find("code")
-            if code_tag:
-                code_classes = code_tag.get("class", [])
-                for cls in code_classes:
-                    if cls.startswith("language-"):
-                        lang = cls.replace("language-", "")
-
-        # Build styled code block with header
-        inner_html = div.decode_contents()
-
-        # Create new wrapper structure
-        new_div = soup.new_tag("div")
-        new_div["style"] = styles["code_block_wrapper"]
-
-        # Header with dots + language label
-        header = soup.new_tag("div")
-        header["style"] = styles["code_block_header"]
-
-        dots_div = soup.new_tag("div")
-        dots_div["style"] = styles["code_block_dots"]
-        for color in ["#ff5f57", "#febc2e", "#28c840"]:
-            dot = soup.new_tag("span")
-            dot["style"] = styles["code_block_dot"] + f" background: {color};"
-            dots_div.append(dot)
-        header.append(dots_div)
-
-        if lang:
-            lang_span = soup.new_tag("span")
-            lang_span["style"] = styles["code_block_lang"]
-            lang_span.string = lang.upper()
-            header.append(lang_span)
-
-        new_div.append(header)
-
-        # Code body
-        body_div = soup.new_tag("div")
-        body_div["style"] = styles["code_block_body"]
-        # Keep original Pygments-highlighted HTML
-        body_div.append(BeautifulSoup(inner_html, "html.parser"))
-        new_div.append(body_div)
-
-        # Remove style from inner pre (it's wrapped now)
-        inner_pre = new_div.find("pre")
-        if inner_pre:
-            inner_pre["style"] = "margin: 0; padding: 0; background: transparent; overflow: visible;"
-
-        div.replace_with(new_div)
-
-    # --- Bare <pre> blocks (non-highlighted) ---
-    for pre in soup.find_all("pre"):
-        # Skip if already inside our styled wrapper
-        if pre.parent and pre.parent.get("style", "").startswith("padding:"):
-            continue
-        # Only style top-level pre blocks
-        wrapper = soup.new_tag("div")
-        wrapper["style"] = styles["code_block_wrapper"]
-
-        body = soup.new_tag("div")
-        body["style"] = styles["code_block_body"]
-        pre_copy = pre.extract()
-        pre_copy["style"] = "margin: 0; padding: 0; background: transparent; overflow: visible;"
-        body.append(pre_copy)
-        wrapper.append(body)
-
-        pre.insert_after(wrapper) if pre.parent else None
-
-    # --- Inline code (not inside pre/code blocks) ---
-    for code in soup.find_all("code"):
-        # Skip code inside pre (those are code blocks)
-        if code.parent and code.parent.name == "pre":
-            continue
-        # Skip code inside our code block body divs
-        if code.parent and code.parent.name == "div":
-            parent_style = code.parent.get("style", "")
-            if "overflow-x" in parent_style or "font-family" in parent_style:
+
+def _wrap(parent, el, wrapper):
+    """Put ``wrapper`` where ``el`` is in ``parent`` and move ``el`` inside it."""
+    wrapper.tail, el.tail = el.tail, None
+    parent.insert(list(parent).index(el), wrapper)
+    parent.remove(el)
+    wrapper.append(el)
+
+
+def style_tree(root, styles, is_raw_block=None) -> None:
+    """Apply inline styles to an ElementTree produced by Markdown, in place.
+
+    ``is_raw_block(text)`` tells whether a paragraph's text is a placeholder
+    for block-level raw HTML (see WeChatStyleTreeprocessor).
+    """
+    # --- Single pass: style simple tags, collect the ones rewritten below ---
+    tables, images, footnotes = [], [], []
+    stack = [(child, root) for child in reversed(root)]
+    while stack:
+        el, parent = stack.pop()
+        name = el.tag
+        if name in SIMPLE_STYLE_TAGS:
+            el.set("style", styles[name])
+        elif name == "p":
+            # A bare <p>placeholder</p> holding block-level raw HTML (e.g. a
+            # code block) is unwrapped and must stay attribute-free to match;
+            # inline raw HTML such as a standalone <img> keeps a styled <p>
+            if len(el) == 0 and el.text and is_raw_block and is_raw_block(el.text):
                 continue
-        code["style"] = styles["code_inline"]
+            # Paragraphs inside blockquotes get different styles
+            if parent.tag == "blockquote":
+                el.set("style", styles["blockquote_p"])
+            else:
+                el.set("style", styles["p"])
+        elif name == "a":
+            # Footnote references and back-references share one style
+            cls = el.get("class", "").split()
+            if "footnote-backref" in cls or "footnote-ref" in cls:
+                el.set("style", styles["footnote_ref"])
+            else:
+                el.set("style", styles["a"])
+        elif name == "code":
+            # Fenced/indented blocks never reach the tree (CodeHilite stashes
+            # them), so every <code> left here is inline code
+            el.set("style", styles["code_inline"])
+        elif name == "div":
+            if "footnote" in el.get("class", "").split():
+                footnotes.append(el)
+        elif name == "table":
+            tables.append((el, parent))
+        elif name == "img":
+            images.append((el, parent))
+        stack.extend((child, el) for child in reversed(el))
 
     # --- Tables ---
-    for table in soup.find_all("table"):
-        # Wrap table in scrollable div
-        wrapper = soup.new_tag("div")
-        wrapper["style"] = styles["table_wrapper"]
-
-        table["style"] = styles["table"]
+    # Markdown emits table > thead/tbody > tr > th/td, so only direct
+    # children need visiting
+    th_style, td_style, td_even_style = styles["th"], styles["td"], styles["td_even"]
+    for table, parent in tables:
+        table.set("style", styles["table"])
 
         # Style headers
-        for th in table.find_all("th"):
-            th["style"] = styles["th"]
+        thead = table.find("thead")
+        if thead is not None:
+            for tr in thead:
+                for th in tr:
+                    th.set("style", th_style)
 
         # Style body rows with zebra stripes
         tbody = table.find("tbody")
-        if tbody:
-            for i, tr in enumerate(tbody.find_all("tr")):
-                for td in tr.find_all("td"):
-                    td["style"] = styles["td_even"] if i % 2 == 1 else styles["td"]
+        if tbody is not None:
+            for i, tr in enumerate(tbody):
+                style = td_even_style if i & 1 else td_style
+                for td in tr:
+                    td.set("style", style)
 
-        table.wrap(wrapper)
-
-    # --- Horizontal rules ---
-    for hr in soup.find_all("hr"):
-        hr["style"] = styles["hr"]
+        # Wrap table in scrollable div
+        _wrap(parent, table, etree.Element("div", style=styles["table_wrapper"]))
 
     # --- Images ---
-    for img in soup.find_all("img"):
-        img["style"] = styles["img"]
+    for img, parent in images:
+        img.set("style", styles["img"])
         # If the image has alt text, add a caption
         alt = img.get("alt", "").strip()
         if alt and alt != "image":
-            caption = soup.new_tag("p")
-            caption["style"] = styles["img_caption"]
-            caption.string = alt
-            img.insert_after(caption)
-
-    # --- Task list done items ---
-    for span in soup.find_all("span", class_="task-done"):
-        span["style"] = styles["task_done"]
+            caption = etree.Element("p", style=styles["img_caption"])
+            caption.text = alt
+            caption.tail, img.tail = img.tail, None
+            parent.insert(list(parent).index(img) + 1, caption)
 
     # --- Footnote section ---
-    for div in soup.find_all("div", class_="footnote"):
-        div["style"] = styles["footnote_section"]
+    for div in footnotes:
+        div.set("style", styles["footnote_section"])
         # Remove the redundant <hr> inside footnote (we use border-top instead)
-        for hr_in_fn in div.find_all("hr"):
-            hr_in_fn.decompose()
+        for hr_in_fn in div.findall("hr"):
+            div.remove(hr_in_fn)
+
+
+_RAW_OPEN_TAG_RE = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)(\s[^>]*?)?(\s*/?)>")
+
+
+_RAW_TABLE_RE = re.compile(r"<table\b.*?</table\s*>", re.IGNORECASE | re.DOTALL)
+_RAW_TBODY_RE = re.compile(r"<tbody\b.*?</tbody\s*>", re.IGNORECASE | re.DOTALL)
+_RAW_TR_RE = re.compile(r"<tr\b.*?</tr\s*>", re.IGNORECASE | re.DOTALL)
+# A real style attribute (not e.g. data-style=); attrs start with whitespace
+_RAW_STYLE_ATTR_RE = re.compile(r"\sstyle\s*=", re.IGNORECASE)
+_RAW_IMG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_RAW_ALT_RE = re.compile(r"""\salt\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+def _style_open_tags(fragment: str, style_for) -> str:
+    """Add ``style_for(name, attrs, match)`` to opening tags that have no style yet."""
+    def replacer(match):
+        name, attrs, close = match.group(1).lower(), match.group(2) or "", match.group(3)
+        if _RAW_STYLE_ATTR_RE.search(attrs):
+            return match.group(0)
+        style = style_for(name, attrs, match)
+        if style is None:
+            return match.group(0)
+        return f'<{match.group(1)}{attrs} style="{style}"{close}>'
+
+    return _RAW_OPEN_TAG_RE.sub(replacer, fragment)
 
-    for sup in soup.find_all("sup"):
-        if sup.find("a", class_="footnote-ref"):
-            pass  # Already styled above
 
-    return str(soup)
+def _style_raw_table(table: str, styles) -> str:
+    """Style a raw HTML table like style_tree does: header, zebra rows, scroll wrapper."""
+    td_style, td_even_style = styles["td"], styles["td_even"]
+
+    def style_tbody(m):
+        rows = 0
+
+        def style_row(r):
+            nonlocal rows
+            style = td_even_style if rows & 1 else td_style
+            rows += 1
+            return _style_open_tags(r.group(0), lambda name, attrs, m: style if name == "td" else None)
+
+        return _RAW_TR_RE.sub(style_row, m.group(0))
+
+    table = _RAW_TBODY_RE.sub(style_tbody, table)
+    table = _style_open_tags(
+        table, lambda name, attrs, m: styles[name] if name in ("table", "th") else None
+    )
+    return f'<div style="{styles["table_wrapper"]}">{table}</div>'
+
+
+def _style_raw_html(fragment: str, styles) -> str:
+    """Add inline styles to the opening tags of a raw HTML fragment.
+
+    Raw HTML (including the task-list spans from preprocess_markdown) is kept
+    out of the Markdown tree, so it is styled on the string: tables get the
+    same header/zebra/wrapper treatment as Markdown tables, everything else
+    only the context-free styles.
+    """
+    if "<table" in fragment or "<TABLE" in fragment:
+        fragment = _RAW_TABLE_RE.sub(lambda m: _style_raw_table(m.group(0), styles), fragment)
+
+    def style_for(name, attrs, match):
+        if name in SIMPLE_STYLE_TAGS or name in ("p", "a", "img"):
+            return styles[name]
+        if name == "span" and "task-done" in attrs:
+            return styles["task_done"]
+        if name == "code":
+            # <code> inside a still-open <pre> (e.g. a highlighted block from
+            # CodeHilite, which is stashed here too) is not inline code
+            text, start = match.string, match.start()
+            if text.rfind("<pre", 0, start) > text.rfind("</pre", 0, start):
+                return None
+            return styles["code_inline"]
+        return None
+
+    fragment = _style_open_tags(fragment, style_for)
+
+    # Caption raw images from their alt text, as style_tree does for Markdown ones
+    if "<img" in fragment or "<IMG" in fragment:
+        fragment = _RAW_IMG_RE.sub(lambda m: _raw_img_caption(m, styles), fragment)
+    return fragment
+
+
+def _raw_img_caption(m: re.Match, styles) -> str:
+    """Return the <img> tag followed by an alt-text caption paragraph, if it has one."""
+    tag = m.group(0)
+    alt = _RAW_ALT_RE.search(tag)
+    if not alt:
+        return tag
+    text = unescape(next(g for g in alt.groups() if g is not None)).strip()
+    if not text or text == "image":
+        return tag
+    return f'{tag}<p style="{styles["img_caption"]}">{escape(text, quote=False)}</p>'
+
+
+class WeChatStyleTreeprocessor(Treeprocessor):
+    """Inline the theme styles into the element tree before serialization."""
+
+    def __init__(self, md, styles):
+        super().__init__(md)
+        self.styles = styles
+
+    def _is_raw_block(self, text: str) -> bool:
+        """True if text is a placeholder for raw HTML that RawHtmlPostprocessor unwraps."""
+        m = HTML_PLACEHOLDER_RE.fullmatch(text)
+        if not m:
+            return False
+        stash = self.md.htmlStash
+        index = int(m.group(1))
+        if index >= stash.html_counter:
+            return False
+        raw_html = self.md.postprocessors["raw_html"]
+        return raw_html.isblocklevel(raw_html.stash_to_string(stash.rawHtmlBlocks[index]))
+
+    def run(self, root):
+        style_tree(root, self.styles, self._is_raw_block)
+        stash = self.md.htmlStash
+        stash.rawHtmlBlocks = [
+            _style_raw_html(block, self.styles) if isinstance(block, str) else block
+            for block in stash.rawHtmlBlocks
+        ]
+
+
+class WeChatStyleExtension(Extension):
+    """Markdown extension that emits WeChat inline-styled HTML directly."""
+
+    def __init__(self, styles, **kwargs):
+        self.styles = styles
+        super().__init__(**kwargs)
+
+    def extendMarkdown(self, md):
+        # Run after CodeHilite, footnotes and TOC have built their elements
+        md.treeprocessors.register(WeChatStyleTreeprocessor(md, self.styles), "wechat_style", 1)
+
+
+_LANG_PREFIX = "language-"
+_PREFIX_LEN = len(_LANG_PREFIX)
+
+
+class WeChatCodeFormatter(HtmlFormatter):
+    """Pygments formatter that renders the styled WeChat code block shell."""
+
+    def __init__(self, wechat_styles, **options):
+        super().__init__(**options)
+        # CodeHilite passes the block language as "language-<name>"
+        lang_str = options.get("lang_str", "")
+        lang = lang_str[_PREFIX_LEN:] if lang_str.startswith(_LANG_PREFIX) else ""
+        lang_label = ""
+        if lang and lang != "text":
+            lang_label = f'<span style="{wechat_styles["code_block_lang"]}">{lang.upper()}</span>'
+        # Header with dots + language label; the code body div follows
+        self._shell_open = (
+            f'<div style="{wechat_styles["code_block_wrapper"]}">'
+            f'<div style="{wechat_styles["code_block_header"]}">'
+            f'{wechat_styles["code_block_dots_html"]}'
+            f'{lang_label}'
+            f'</div>'
+            f'<div style="{wechat_styles["code_block_body"]}">'
+        )
+
+    def _wrap_div(self, inner):
+        yield 0, self._shell_open
+        yield from inner
+        yield 0, "</div></div>\n"
+
+    def _wrap_pre(self, inner):
+        yield 0, f'<pre style="{CODE_PRE_STYLE}"><span></span>'
+        yield from inner
+        yield 0, "</pre>"
 
 
 # ──────────────────────────────────────────────
@@ -603,67 +732,91 @@ class LanguageTracker:
             self.languages.append(lang)
             return f"```{lang}"
 
-        return re.sub(r"^```(\w+)\s*$", replacer, md_text, flags=re.MULTILINE)
+        return _FENCE_LANG_RE.sub(replacer, md_text)
 
 
 # ──────────────────────────────────────────────
 # Main Converter
 # ──────────────────────────────────────────────
 
-def convert(md_content: str, theme_name: str = "blue") -> str:
-    """Convert markdown content to WeChat-compatible HTML with inline styles."""
-    t = THEMES.get(theme_name, THEMES["blue"])
-    styles = build_styles(theme_name)
+# Footnote/TOC extensions are only loaded for documents that use them
+_FOOTNOTE_RE = re.compile(r"\[\^[^\]\s]+\]")
+_TOC_RE = re.compile(r"\[TOC\]|\]\(#")
 
-    # Pre-process markdown
-    md_content = preprocess_markdown(md_content)
 
-    # Configure markdown extensions
+@functools.lru_cache(maxsize=16)
+def _markdown_parser(theme_name: str, footnotes: bool = True, toc: bool = True) -> markdown.Markdown:
+    """Return a shared Markdown parser that emits styled HTML for a theme.
+
+    Building the extension pipeline is costly, so parsers are reused;
+    callers must ``reset()`` before each conversion.
+    """
+    t = THEMES.get(theme_name, THEMES["blue"])
+    styles = build_styles(theme_name)
     extensions = [
         TableExtension(),
         FencedCodeExtension(),
-        FootnoteExtension(),
-        TocExtension(permalink=False),
         CodeHiliteExtension(
             pygments_style=t["pygments_style"],
+            pygments_formatter=_memoize_pygments(
+                functools.partial(WeChatCodeFormatter, styles)
+            ),
             noclasses=True,
             linenums=False,
-            guess_lang=True,
+            # Untagged blocks render as plain text rather than running
+            # every Pygments analyser to guess a lexer
+            guess_lang=False,
         ),
+        WeChatStyleExtension(styles),
     ]
+    if footnotes:
+        extensions.append(FootnoteExtension())
+    if toc:
+        # Also gives headings the ids that in-page "](#...)" links target
+        extensions.append(TocExtension(permalink=False))
+    return markdown.Markdown(extensions=extensions)
 
-    # Convert markdown to raw HTML
-    md_parser = markdown.Markdown(extensions=extensions)
-    raw_html = md_parser.convert(md_content)
 
-    # Apply inline styles with BeautifulSoup
-    styled_html = apply_styles(raw_html, styles, t)
+def _convert_body(md_content: str, theme_name: str) -> str:
+    """Convert markdown to inline-styled HTML (no document wrapper)."""
+    md_content = preprocess_markdown(md_content)
+    md_parser = _markdown_parser(
+        theme_name,
+        footnotes=_FOOTNOTE_RE.search(md_content) is not None,
+        toc=_TOC_RE.search(md_content) is not None,
+    )
+    md_parser.reset()
+    return md_parser.convert(md_content)
 
-    # Build full HTML document with preview shell
-    return build_document(styled_html, styles, t)
 
+def convert(md_content: str, theme_name: str = "blue") -> str:
+    """Convert markdown content to WeChat-compatible HTML with inline styles."""
+    return "".join(iter_document(_convert_body(md_content, theme_name), theme_name))
 
-def build_document(body_html: str, styles: dict, theme: dict) -> str:
-    """Generate a complete HTML document with copy-to-clipboard and preview."""
-    primary = theme["primary"]
-    font = theme["font_body"]
-    return f"""<!DOCTYPE html>
+
+def convert_stream(md_content: str, theme_name: str, out_fp: TextIO) -> None:
+    """Like convert(), but write the document to a text file object in segments."""
+    out_fp.writelines(iter_document(_convert_body(md_content, theme_name), theme_name))
+
+
+# Preview shell around the article; rendered once per theme at import
+_DOCUMENT_HEAD = string.Template("""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>微信公众号文章预览 - {theme['name']}</title>
+    <title>微信公众号文章预览 - $name</title>
     <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
             background: #f0f2f5;
             display: flex;
             flex-direction: column;
             align-items: center;
             padding: 20px;
-            font-family: {font};
-        }}
-        .toolbar {{
+            font-family: $font;
+        }
+        .toolbar {
             position: sticky;
             top: 0;
             z-index: 100;
@@ -676,9 +829,9 @@ def build_document(body_html: str, styles: dict, theme: dict) -> str:
             gap: 16px;
             align-items: center;
             flex-wrap: wrap;
-        }}
-        .toolbar button {{
-            background: {primary};
+        }
+        .toolbar button {
+            background: $primary;
             color: #fff;
             border: none;
             padding: 10px 24px;
@@ -688,23 +841,23 @@ def build_document(body_html: str, styles: dict, theme: dict) -> str:
             font-weight: 500;
             transition: all 0.2s;
             box-shadow: 0 2px 6px rgba(0,0,0,0.12);
-        }}
-        .toolbar button:hover {{
+        }
+        .toolbar button:hover {
             opacity: 0.9;
             transform: translateY(-1px);
             box-shadow: 0 4px 10px rgba(0,0,0,0.15);
-        }}
-        .toolbar button:active {{ transform: translateY(0); }}
-        .toolbar .hint {{
+        }
+        .toolbar button:active { transform: translateY(0); }
+        .toolbar .hint {
             color: #888;
             font-size: 13px;
-        }}
-        .toolbar .status {{
+        }
+        .toolbar .status {
             font-size: 13px;
             font-weight: 500;
             transition: opacity 0.3s;
-        }}
-        .phone-frame {{
+        }
+        .phone-frame {
             background: #fff;
             max-width: 420px;
             width: 100%;
@@ -712,30 +865,30 @@ def build_document(body_html: str, styles: dict, theme: dict) -> str:
             box-shadow: 0 8px 40px rgba(0,0,0,0.12);
             overflow: hidden;
             border: 8px solid #1a1a1a;
-        }}
-        .phone-header {{
+        }
+        .phone-header {
             background: #1a1a1a;
             padding: 10px 20px 8px;
             display: flex;
             justify-content: center;
             align-items: center;
-        }}
-        .phone-notch {{
+        }
+        .phone-notch {
             width: 120px;
             height: 24px;
             background: #000;
             border-radius: 12px;
-        }}
-        .phone-content {{
+        }
+        .phone-content {
             padding: 20px 16px 30px;
             max-height: 80vh;
             overflow-y: auto;
-        }}
-        #content {{
-            font-family: {font};
-        }}
+        }
+        #content {
+            font-family: $font;
+        }
         /* Clean up Pygments pre inside our wrapper */
-        #content pre {{ background: transparent !important; }}
+        #content pre { background: transparent !important; }
     </style>
 </head>
 <body>
@@ -749,37 +902,78 @@ def build_document(body_html: str, styles: dict, theme: dict) -> str:
             <div class="phone-notch"></div>
         </div>
         <div class="phone-content">
-            <div id="content" style="{styles['container']}">
-{body_html}
+            <div id="content" style="$container_style">
+""")
+
+
+def _render_document_head(styles, theme: dict) -> str:
+    """Render the preview shell up to (and including) the content div."""
+    return _DOCUMENT_HEAD.substitute(
+        name=theme["name"],
+        font=theme["font_body"],
+        primary=theme["primary"],
+        container_style=styles["container"],
+    )
+
+
+_DOCUMENT_TAIL = """
             </div>
         </div>
     </div>
     <script>
-        function copyContent() {{
+        function copyContent() {
             const content = document.getElementById('content');
             const range = document.createRange();
             range.selectNodeContents(content);
             const sel = window.getSelection();
             sel.removeAllRanges();
             sel.addRange(range);
-            try {{
+            try {
                 document.execCommand('copy');
                 showStatus('已复制！可直接粘贴到公众号编辑器', '#52c41a');
-            }} catch (e) {{
+            } catch (e) {
                 showStatus('复制失败，请手动 Ctrl+A 全选后复制', '#f5222d');
-            }}
+            }
             sel.removeAllRanges();
-        }}
-        function showStatus(msg, color) {{
+        }
+        function showStatus(msg, color) {
             const el = document.getElementById('status');
             el.textContent = msg;
             el.style.color = color;
-            setTimeout(() => {{ el.style.opacity = '0'; setTimeout(() => {{ el.textContent = ''; el.style.opacity = '1'; }}, 300); }}, 3000);
-        }}
+            setTimeout(() => { el.style.opacity = '0'; setTimeout(() => { el.textContent = ''; el.style.opacity = '1'; }, 300); }, 3000);
+        }
     </script>
 </body>
 </html>"""
 
+# The shell around the article depends only on the theme.
+_DOCUMENT_HEADS = {
+    name: _render_document_head(_STYLES[name], t) for name, t in THEMES.items()
+}
+
+
+def iter_document(body_html: str, theme_name: str = "blue") -> Iterator[str]:
+    """Yield the preview document (head, article body, tail) in segments."""
+    yield _DOCUMENT_HEADS.get(theme_name) or _DOCUMENT_HEADS["blue"]
+    yield body_html
+    yield _DOCUMENT_TAIL
+
+
+_DOCUMENT_HEADS_UTF8 = {name: head.encode("utf-8") for name, head in _DOCUMENT_HEADS.items()}
+_DOCUMENT_TAIL_UTF8 = _DOCUMENT_TAIL.encode("utf-8")
+
+
+def iter_document_bytes(body_html: str, theme_name: str = "blue") -> Iterator[bytes]:
+    """Like iter_document(), as UTF-8 bytes with the shell pre-encoded."""
+    yield _DOCUMENT_HEADS_UTF8.get(theme_name) or _DOCUMENT_HEADS_UTF8["blue"]
+    yield body_html.encode("utf-8")
+    yield _DOCUMENT_TAIL_UTF8
+
+
+def build_document(body_html: str, styles: dict, theme: dict) -> str:
+    """Generate a complete HTML document with copy-to-clipboard and preview."""
+    return _render_document_head(styles, theme) + body_html + _DOCUMENT_TAIL
+
 
 # ──────────────────────────────────────────────
 # CLI Entry Point
@@ -806,9 +1000,10 @@ def convert_single(input_path: Path, output_path: Path | None, theme: str) -> Pa
     if not output_path:
         output_path = input_path.with_name(f"{input_path.stem}_wechat.html")
 
-    md_content = input_path.read_text(encoding="utf-8")
-    html_content = convert(md_content, theme)
-    output_path.write_text(html_content, encoding="utf-8")
+    md_content = input_path.read_bytes().decode("utf-8")
+    body_html = _convert_body(md_content, theme)
+    with open(output_path, "wb") as f:
+        f.writelines(iter_document_bytes(body_html, theme))
     return output_path
 
 
@@ -823,6 +1018,7 @@ def main():
   python convert.py article.md -o output.html      # 指定输出文件
   python convert.py --dir ./articles               # 批量转换目录下所有 .md
   python convert.py --dir ./articles --theme warm  # 批量转换，温暖橙主题
+  python convert.py --dir ./articles --jobs 1      # 批量转换，单进程（便于调试）
         """,
     )
     parser.add_argument("input", nargs="?", help="输入 Markdown 文件路径")
@@ -837,6 +1033,12 @@ def main():
         "--dir",
         help="批量转换：指定目录路径，转换该目录下所有 .md 文件",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="批量转换的并行进程数 (默认: CPU 核数，1 为串行)",
+    )
 
     args = parser.parse_args()
 
@@ -858,10 +1060,18 @@ def main():
         _out(f"主题: {theme['name']}")
         _out("-" * 50)
 
+        jobs = max(1, min(args.jobs, len(md_files)))
+        if jobs == 1:
+            results = [convert_single(md_file, None, args.theme) for md_file in md_files]
+        else:
+            # Each file is independent CPU-bound work: fan out across processes
+            with ProcessPoolExecutor(max_workers=jobs) as ex:
+                results = list(ex.map(convert_single, md_files, [None] * len(md_files),
+                                      [args.theme] * len(md_files)))
+
         success = 0
         failed = 0
-        for md_file in md_files:
-            out_path = convert_single(md_file, None, args.theme)
+        for md_file, out_path in zip(md_files, results):
             if out_path:
                 _out(f"  [OK] {md_file.name} -> {out_path.name}")
                 success += 1
@@ -905,33 +1115,7 @@ def convert_to_wechat_content(md_content: str, theme_name: str = "blue") -> str:
     Returns HTML with inline styles (no document wrapper), used by the publisher
     for API-based article creation via WeChat Official Account API.
     """
-    t = THEMES.get(theme_name, THEMES["blue"])
-    styles = build_styles(theme_name)
-
-    # Pre-process markdown
-    md_content = preprocess_markdown(md_content)
-
-    # Configure markdown extensions
-    extensions = [
-        TableExtension(),
-        FencedCodeExtension(),
-        FootnoteExtension(),
-        TocExtension(permalink=False),
-        CodeHiliteExtension(
-            pygments_style=t["pygments_style"],
-            noclasses=True,
-            linenums=False,
-            guess_lang=True,
-        ),
-    ]
-
-    # Convert markdown to raw HTML
-    md_parser = markdown.Markdown(extensions=extensions)
-    raw_html = md_parser.convert(md_content)
-
-    # Apply inline styles with BeautifulSoup
-    styled_html = apply_styles(raw_html, styles, t)
-    return styled_html
+    return _convert_body(md_content, theme_name)
 
 
 if __name__ == "__main__":
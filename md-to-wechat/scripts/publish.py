@@ -15,19 +15,54 @@ Usage:
 
 Dependencies:
     pip install requests markdown pygments beautifulsoup4
+    pip install orjson  # optional, faster JSON for API requests
 """
 
 import argparse
+import functools
+import hashlib
 import json
+import os
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urlparse
 
+# Third-party modules are bound once here; a missing requests is reported by main()
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+# API payloads carry the whole article HTML; orjson encodes it much faster
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    _json_loads = json.loads
+
 SCRIPT_DIR = Path(__file__).parent
 CONFIG_FILE = SCRIPT_DIR / ".wechat_config.json"
 TOKEN_CACHE_FILE = SCRIPT_DIR / ".wechat_token.json"
+IMAGE_CACHE_FILE = SCRIPT_DIR / ".wechat_image_cache.json"
+
+# Concurrent image uploads per article
+UPLOAD_WORKERS = 8
 
 # Add scripts dir to path for importing convert
 sys.path.insert(0, str(SCRIPT_DIR))
@@ -37,25 +72,52 @@ sys.path.insert(0, str(SCRIPT_DIR))
 # Utilities
 # ──────────────────────────────────────────────
 
+# UTF-8 stdout for Windows consoles, opened once (closefd=False keeps the
+# real stdout open when this handle is collected)
+try:
+    _OUT = open(sys.stdout.fileno(), "w", encoding="utf-8", errors="replace",
+                buffering=1, closefd=False)
+except Exception:
+    _OUT = None
+
+
 def _print(msg: str):
     """Print with UTF-8 encoding for Windows compatibility."""
-    import io
     try:
-        out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace", line_buffering=True)
-        out.write(msg + "\n")
-        out.flush()
-        out.detach()
+        _OUT.write(msg + "\n")
     except Exception:
         print(msg)
 
 
+def _write_text_atomic(path: Path, text: str):
+    """Write a UTF-8 file via a temp file + os.replace, so it is never left half-written."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@functools.lru_cache(maxsize=None)
+def _http():
+    """Return the shared HTTP session (keep-alive connection pool + retries)."""
+    # Retry only covers idempotent methods, so API POSTs are never replayed
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 # ──────────────────────────────────────────────
 # Configuration Management
 # ──────────────────────────────────────────────
 
 def save_config(config: dict):
     """Save WeChat config (AppID, AppSecret) to file."""
-    CONFIG_FILE.write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_text_atomic(CONFIG_FILE, json.dumps(config, ensure_ascii=False, indent=2))
     _print(f"配置已保存到: {CONFIG_FILE}")
 
 
@@ -123,10 +185,8 @@ def _ensure_config() -> dict:
 
 def _fetch_access_token(appid: str, appsecret: str) -> str | None:
     """Fetch a new access_token from WeChat API."""
-    import requests
-
     try:
-        resp = requests.get(
+        resp = _http().get(
             "https://api.weixin.qq.com/cgi-bin/token",
             params={
                 "grant_type": "client_credential",
@@ -135,7 +195,7 @@ def _fetch_access_token(appid: str, appsecret: str) -> str | None:
             },
             timeout=15,
         )
-        data = resp.json()
+        data = _json_loads(resp.content)
         if "access_token" in data:
             return data["access_token"]
         else:
@@ -168,47 +228,135 @@ def get_access_token(config: dict) -> str | None:
             "access_token": token,
             "expires_at": time.time() + 7200,  # 2 hours
         }
-        TOKEN_CACHE_FILE.write_text(json.dumps(cache), encoding="utf-8")
+        _write_text_atomic(TOKEN_CACHE_FILE, json.dumps(cache))
         return token
 
     return None
 
 
+# errcodes for an invalid/expired access_token
+_TOKEN_ERRCODES = {40001, 40014, 42001}
+_token_lock = threading.Lock()
+# Rejected token -> its replacement. Callers keep passing the token they
+# started with; _api_post swaps in the replacement before sending, so one
+# rejection fixes every later call instead of each one failing first
+_token_renewals: dict[str, str] = {}
+
+
+def _current_token(access_token: str) -> str:
+    """Follow recorded refreshes from access_token to the newest token."""
+    while access_token in _token_renewals:
+        access_token = _token_renewals[access_token]
+    return access_token
+
+
+def _refresh_access_token(rejected: str) -> str | None:
+    """Replace a token WeChat rejected; other callers reuse the one refresh."""
+    with _token_lock:
+        # Another thread may already have replaced it
+        if rejected in _token_renewals:
+            return _current_token(rejected)
+        config = load_config()
+        if not config:
+            return None
+        token = get_access_token(config)
+        if token == rejected:
+            TOKEN_CACHE_FILE.unlink(missing_ok=True)
+            token = get_access_token(config)
+        if token and token != rejected:
+            _token_renewals[rejected] = token
+        return token
+
+
+def _api_post(url: str, access_token: str, **kwargs) -> dict:
+    """POST to a WeChat API url (with an {access_token} placeholder), return the JSON.
+
+    A token rejected as invalid or expired is refreshed and the call retried
+    once; later calls made with the rejected token go straight to the new one.
+    """
+    access_token = _current_token(access_token)
+    resp = _http().post(url.format(access_token=access_token), **kwargs)
+    data = _json_loads(resp.content)
+    if data.get("errcode") in _TOKEN_ERRCODES:
+        token = _refresh_access_token(access_token)
+        if token and token != access_token:
+            resp = _http().post(url.format(access_token=token), **kwargs)
+            data = _json_loads(resp.content)
+    return data
+
+
 # ──────────────────────────────────────────────
 # Image Upload
 # ──────────────────────────────────────────────
 
+# Uploaded images, so the same picture is never sent to WeChat twice:
+# source URL -> WeChat URL for this process, sha256 -> WeChat URL on disk
+_uploaded_urls: dict[str, str] = {}
+_image_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _image_cache() -> dict:
+    """Load the sha256 -> WeChat image URL cache (once per process)."""
+    if IMAGE_CACHE_FILE.exists():
+        try:
+            return json.loads(IMAGE_CACHE_FILE.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, IOError):
+            pass
+    return {}
+
+
+def _save_image_cache():
+    """Persist the image upload cache next to the token cache."""
+    with _image_cache_lock:
+        text = json.dumps(_image_cache(), indent=0)
+    _write_text_atomic(IMAGE_CACHE_FILE, text)
+
+
 def upload_image(access_token: str, image_url: str) -> str | None:
     """Upload an image to WeChat from URL and return the WeChat media URL.
 
     Uses the 'uploadimg' API for article inline images.
-    Returns the WeChat-hosted image URL.
+    Returns the WeChat-hosted image URL. Images already uploaded (same URL in
+    this run, or same content in any run) are not uploaded again.
     """
-    import requests
-    import tempfile
+    cached = _uploaded_urls.get(image_url)
+    if cached:
+        return cached
 
     try:
-        # Download the image first
-        resp = requests.get(image_url, timeout=30)
-        if resp.status_code != 200:
-            _print(f"  下载图片失败: {image_url}")
-            return None
-
-        content_type = resp.headers.get("content-type", "image/png")
-        ext = ".png"
-        if "jpeg" in content_type or "jpg" in content_type:
-            ext = ".jpg"
-        elif "gif" in content_type:
-            ext = ".gif"
+        # Download the image; status and type are checked before the body is read
+        with _http().get(image_url, stream=True, timeout=30) as resp:
+            if resp.status_code != 200:
+                _print(f"  下载图片失败: {image_url}")
+                return None
+
+            content_type = resp.headers.get("content-type", "image/png")
+            ext = ".png"
+            if "jpeg" in content_type or "jpg" in content_type:
+                ext = ".jpg"
+            elif "gif" in content_type:
+                ext = ".gif"
+            img_data = resp.content
+
+        digest = hashlib.sha256(img_data).hexdigest()
+        with _image_cache_lock:
+            cached = _image_cache().get(digest)
+        if cached:
+            _uploaded_urls[image_url] = cached
+            return cached
 
         # Upload to WeChat
-        upload_resp = requests.post(
-            f"https://api.weixin.qq.com/cgi-bin/media/uploadimg?access_token={access_token}",
-            files={"media": (f"image{ext}", resp.content, content_type)},
+        data = _api_post(
+            "https://api.weixin.qq.com/cgi-bin/media/uploadimg?access_token={access_token}",
+            access_token,
+            files={"media": (f"image{ext}", img_data, content_type)},
             timeout=30,
         )
-        data = upload_resp.json()
         if "url" in data:
+            with _image_cache_lock:
+                _image_cache()[digest] = data["url"]
+            _uploaded_urls[image_url] = data["url"]
             return data["url"]
         else:
             _print(f"  上传图片失败: {data.get('errmsg', 'unknown error')}")
@@ -224,8 +372,6 @@ def upload_thumb_media(access_token: str, image_path: str | None = None) -> str
     If no image_path provided, creates a default placeholder thumb.
     Uses the permanent material API (required for draft creation).
     """
-    import requests
-
     try:
         if image_path and Path(image_path).exists():
             img_data = Path(image_path).read_bytes()
@@ -236,12 +382,12 @@ def upload_thumb_media(access_token: str, image_path: str | None = None) -> str
             img_data = _create_default_thumb()
             filename = "thumb.jpg"
 
-        upload_resp = requests.post(
-            f"https://api.weixin.qq.com/cgi-bin/material/add_material?access_token={access_token}&type=image",
+        data = _api_post(
+            "https://api.weixin.qq.com/cgi-bin/material/add_material?access_token={access_token}&type=image",
+            access_token,
             files={"media": (filename, img_data, "image/jpeg")},
             timeout=30,
         )
-        data = upload_resp.json()
         if "media_id" in data:
             _print(f"封面图已上传: media_id={data['media_id'][:20]}...")
             return data["media_id"]
@@ -253,19 +399,25 @@ def upload_thumb_media(access_token: str, image_path: str | None = None) -> str
         return None
 
 
+@functools.lru_cache(maxsize=1)
 def _create_default_thumb() -> bytes:
-    """Create a simple default thumbnail image (300x200 blue gradient)."""
+    """Create a simple default thumbnail image (900x500 blue gradient).
+
+    The image never changes, so it is generated once per process.
+    """
     try:
         # Try using PIL if available
-        from PIL import Image, ImageDraw, ImageFont
-        img = Image.new("RGB", (900, 500), color=(30, 111, 255))
-        draw = ImageDraw.Draw(img)
-        # Add a subtle gradient effect
-        for y in range(500):
-            r = int(30 + (y / 500) * 40)
-            g = int(111 - (y / 500) * 30)
-            b = int(255 - (y / 500) * 50)
-            draw.line([(0, y), (900, y)], fill=(r, g, b))
+        from PIL import Image
+        # Add a subtle gradient effect: one solid RGB row per y, built as raw pixels
+        pixels = b"".join(
+            bytes((
+                int(30 + (y / 500) * 40),
+                int(111 - (y / 500) * 30),
+                int(255 - (y / 500) * 50),
+            )) * 900
+            for y in range(500)
+        )
+        img = Image.frombytes("RGB", (900, 500), pixels)
         import io
         buf = io.BytesIO()
         img.save(buf, format="JPEG", quality=85)
@@ -304,21 +456,35 @@ def _create_default_thumb() -> bytes:
     )
 
 
+# An <img> with an http(s) source not already hosted on WeChat
+_UPLOADABLE_IMG_RE = re.compile(
+    r"""<img\b[^>]*?\bsrc\s*=\s*["']?https?://(?![^"'\s>]*mmbiz\.qpic\.cn)""",
+    re.IGNORECASE,
+)
+
+
 def replace_images_in_html(access_token: str, html_content: str) -> str:
     """Find all images in HTML content, upload them to WeChat, and replace URLs."""
-    try:
-        from bs4 import BeautifulSoup
-    except ImportError:
+    # Nothing to upload: skip building the DOM at all
+    if not _UPLOADABLE_IMG_RE.search(html_content):
+        return html_content
+
+    if BeautifulSoup is None:
         return html_content
 
-    soup = BeautifulSoup(html_content, "html.parser")
-    img_tags = soup.find_all("img")
+    # html.parser, not lxml: lxml moves leading comments/<style>/<meta> out
+    # of <body> and wraps stray text, while this pass only swaps <img> srcs
+    # and must hand back everything else untouched
+    root = BeautifulSoup(html_content, "html.parser")
+    img_tags = root.find_all("img")
 
     if not img_tags:
         return html_content
 
     _print(f"发现 {len(img_tags)} 张图片，正在上传到微信...")
 
+    # Group tags by source so an image used several times is uploaded once
+    pending = {}
     for img in img_tags:
         src = img.get("src", "")
         if not src:
@@ -330,15 +496,26 @@ def replace_images_in_html(access_token: str, html_content: str) -> str:
 
         # Only upload http/https images
         if src.startswith(("http://", "https://")):
-            _print(f"  上传: {src[:80]}...")
-            new_url = upload_image(access_token, src)
-            if new_url:
-                img["src"] = new_url
-                _print(f"  成功: {new_url[:60]}...")
-            else:
-                _print(f"  跳过（上传失败）")
-
-    return str(soup)
+            pending.setdefault(src, []).append(img)
+
+    if pending:
+        # Downloads/uploads are network-bound, so run them concurrently
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, len(pending))) as pool:
+            futures = {}
+            for src in pending:
+                _print(f"  上传: {src[:80]}...")
+                futures[pool.submit(upload_image, access_token, src)] = src
+            for future in as_completed(futures):
+                new_url = future.result()
+                if new_url:
+                    for img in pending[futures[future]]:
+                        img["src"] = new_url
+                    _print(f"  成功: {new_url[:60]}...")
+                else:
+                    _print(f"  跳过（上传失败）: {futures[future][:80]}")
+        _save_image_cache()
+
+    return root.decode_contents()
 
 
 # ──────────────────────────────────────────────
@@ -352,34 +529,25 @@ def _truncate_wechat_title(title: str, max_chars: int = 10) -> str:
     approximately 10 CJK characters or ~30 ASCII characters.
     For certified service accounts, the limit is 64 characters.
 
-    This function counts CJK characters as 3 units, others as 1,
-    and truncates to stay within max_chars CJK equivalents.
+    The length is measured in UTF-8 bytes (CJK = 3, ASCII = 1), and the
+    title is truncated to stay within max_chars CJK equivalents.
     """
-    cost = 0
-    limit = max_chars * 3  # CJK char = 3 units
-    result = []
-    for ch in title:
-        # CJK characters cost 3 units, others cost 1
-        if ord(ch) > 0x7F:
-            c = 3
-        else:
-            c = 1
-        if cost + c > limit:
-            break
-        cost += c
-        result.append(ch)
-    truncated = "".join(result)
-    if len(truncated) < len(title):
-        _print(f"  标题过长，已截断: {truncated}")
+    limit = max_chars * 3  # CJK char = 3 bytes
+    # ASCII is one byte per character, so short ASCII titles need no encoding
+    if title.isascii() and len(title) <= limit:
+        return title
+    encoded = title.encode("utf-8")
+    if len(encoded) <= limit:
+        return title
+    # Cut in bytes; a partial trailing character is dropped by the decoder
+    truncated = encoded[:limit].decode("utf-8", "ignore")
+    _print(f"  标题过长，已截断: {truncated}")
     return truncated
 
 
-def create_draft(access_token: str, title: str, content: str,
-                 thumb_media_id: str, author: str = "",
-                 digest: str = "") -> str | None:
-    """Create a draft article on WeChat. Returns media_id on success."""
-    import requests
-
+def draft_article(title: str, content: str, thumb_media_id: str,
+                  author: str = "", digest: str = "") -> dict:
+    """Build one entry of the draft API's "articles" list."""
     # WeChat title limit: ~10 CJK chars for subscription accounts
     title = _truncate_wechat_title(title)
 
@@ -388,7 +556,7 @@ def create_draft(access_token: str, title: str, content: str,
         # Truncate digest to safe length (18 CJK chars = 54 bytes)
         digest = _truncate_wechat_title(digest, 18)
 
-    article = {
+    return {
         "title": title,
         "author": author,
         "digest": digest,
@@ -398,13 +566,27 @@ def create_draft(access_token: str, title: str, content: str,
         "only_fans_can_comment": 0,
     }
 
-    resp = requests.post(
-        f"https://api.weixin.qq.com/cgi-bin/draft/add?access_token={access_token}",
-        data=json.dumps({"articles": [article]}, ensure_ascii=False).encode("utf-8"),
+
+def create_draft(access_token: str, title: str, content: str,
+                 thumb_media_id: str, author: str = "",
+                 digest: str = "") -> str | None:
+    """Create a draft article on WeChat. Returns media_id on success."""
+    article = draft_article(title, content, thumb_media_id, author, digest)
+    return create_drafts_batch(access_token, [article])
+
+
+def create_drafts_batch(access_token: str, articles: list[dict]) -> str | None:
+    """Create one draft holding several articles (多图文, up to 8) in a single call.
+
+    Returns the draft's media_id on success.
+    """
+    data = _api_post(
+        "https://api.weixin.qq.com/cgi-bin/draft/add?access_token={access_token}",
+        access_token,
+        data=_json_dumps({"articles": articles}),
         headers={"Content-Type": "application/json; charset=utf-8"},
         timeout=30,
     )
-    data = resp.json()
 
     if "media_id" in data:
         _print(f"草稿已创建: media_id={data['media_id'][:30]}...")
@@ -423,15 +605,13 @@ def publish_draft(access_token: str, media_id: str) -> str | None:
     messages feed. They are published as 'not notified' articles.
     Use the mass-send API if you need push notification.
     """
-    import requests
-
-    resp = requests.post(
-        f"https://api.weixin.qq.com/cgi-bin/freepublish/submit?access_token={access_token}",
-        data=json.dumps({"media_id": media_id}, ensure_ascii=False).encode("utf-8"),
+    data = _api_post(
+        "https://api.weixin.qq.com/cgi-bin/freepublish/submit?access_token={access_token}",
+        access_token,
+        data=_json_dumps({"media_id": media_id}),
         headers={"Content-Type": "application/json; charset=utf-8"},
         timeout=30,
     )
-    data = resp.json()
 
     if data.get("errcode", 0) == 0:
         publish_id = data.get("publish_id", "")
@@ -446,15 +626,13 @@ def publish_draft(access_token: str, media_id: str) -> str | None:
 
 def check_publish_status(access_token: str, publish_id: str) -> dict | None:
     """Check the status of a publish request."""
-    import requests
-
-    resp = requests.post(
-        f"https://api.weixin.qq.com/cgi-bin/freepublish/get?access_token={access_token}",
-        data=json.dumps({"publish_id": publish_id}, ensure_ascii=False).encode("utf-8"),
+    data = _api_post(
+        "https://api.weixin.qq.com/cgi-bin/freepublish/get?access_token={access_token}",
+        access_token,
+        data=_json_dumps({"publish_id": publish_id}),
         headers={"Content-Type": "application/json; charset=utf-8"},
         timeout=15,
     )
-    data = resp.json()
     return data
 
 
@@ -462,6 +640,12 @@ def check_publish_status(access_token: str, publish_id: str) -> dict | None:
 # Main Publish Flow
 # ──────────────────────────────────────────────
 
+_FM_LINE_RE = re.compile(r"^([^:\n]*):(.*)$", re.MULTILINE)
+_H1_RE = re.compile(r"^#\s+(.+)", re.MULTILINE)
+_MD_CHARS_RE = re.compile(r"[*_~`\[\]]")
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+
+
 def strip_frontmatter(md_text: str) -> tuple[str, dict]:
     """Remove YAML frontmatter from markdown and return (content, metadata).
 
@@ -473,18 +657,15 @@ def strip_frontmatter(md_text: str) -> tuple[str, dict]:
         parts = md_text.split("---", 2)
         if len(parts) >= 3:
             fm_text = parts[1].strip()
-            for line in fm_text.split("\n"):
-                line = line.strip()
-                if ":" in line:
-                    key, _, value = line.partition(":")
-                    metadata[key.strip()] = value.strip()
+            for m in _FM_LINE_RE.finditer(fm_text):
+                metadata[m.group(1).strip()] = m.group(2).strip()
             md_text = parts[2].strip()
     return md_text, metadata
 
 
 def extract_title(md_text: str) -> str:
     """Extract title from first h1 heading."""
-    match = re.match(r"^#\s+(.+)", md_text, re.MULTILINE)
+    match = _H1_RE.match(md_text)
     if match:
         return match.group(1).strip()
     for line in md_text.split("\n"):
@@ -503,8 +684,8 @@ def extract_digest(md_text: str) -> str:
         if not line or line.startswith("#") or line.startswith("!") or line.startswith("---"):
             continue
         # Clean markdown formatting
-        clean = re.sub(r"[*_~`\[\]]", "", line)
-        clean = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", clean)
+        clean = _MD_CHARS_RE.sub("", line)
+        clean = _MD_LINK_RE.sub(r"\1", clean)
         if len(clean) > 10:
             return clean[:120]
     return ""
@@ -530,12 +711,28 @@ def publish_article(
 
     Returns True on success.
     """
+    article = prepare_article(md_file, title=title, author=author, theme=theme)
+    if article is None:
+        return False
+    return _upload_article(article, publish=publish, thumb=thumb)
+
+
+def prepare_article(
+    md_file: str,
+    title: str | None = None,
+    author: str = "",
+    theme: str = "blue",
+) -> dict | None:
+    """Read a markdown file and convert it to WeChat HTML (no network access).
+
+    Returns a dict with title, author, digest and html_content, or None.
+    """
     md_path = Path(md_file)
     if not md_path.exists():
         _print(f"错误: 文件不存在: {md_path}")
-        return False
+        return None
 
-    raw_content = md_path.read_text(encoding="utf-8")
+    raw_content = md_path.read_bytes().decode("utf-8")
 
     # Strip frontmatter and extract metadata
     md_content, frontmatter = strip_frontmatter(raw_content)
@@ -543,7 +740,6 @@ def publish_article(
     # Extract title: CLI arg > frontmatter > h1 heading
     if not title:
         title = frontmatter.get("title") or extract_title(md_content)
-    _print(f"文章标题: {title}")
 
     # Extract author from frontmatter if not provided via CLI
     if not author and frontmatter.get("author"):
@@ -558,7 +754,16 @@ def publish_article(
         html_content = convert_to_wechat_content(md_content, theme)
     except ImportError:
         _print("错误: 无法导入 convert 模块，请确认 convert.py 存在")
-        return False
+        return None
+
+    return {"title": title, "author": author, "digest": digest, "html_content": html_content}
+
+
+def _upload_article(article: dict, publish: bool = False, thumb: str | None = None) -> bool:
+    """Upload images and thumb for a prepared article, then create (and publish) the draft."""
+    title, author, digest = article["title"], article["author"], article["digest"]
+    html_content = article["html_content"]
+    _print(f"文章标题: {title}")
 
     # Get config and token
     config = _ensure_config()
@@ -603,6 +808,57 @@ def publish_article(
     return True
 
 
+def _batch_grouped_drafts(md_files, group, thumb, author, theme, delay, success_list, fail_list):
+    """Create one multi-article draft per `group` files (draft-only batch mode)."""
+    groups = [md_files[i:i + group] for i in range(0, len(md_files), group)]
+    for gidx, files in enumerate(groups, 1):
+        _print(f"\n[{gidx}/{len(groups)}] {', '.join(f.name for f in files)}")
+        _print("-" * 40)
+
+        names = []
+        try:
+            access_token = get_access_token(_ensure_config())
+            if not access_token:
+                raise RuntimeError("无法获取 access_token")
+
+            # One cover upload is shared by every article in the draft
+            _print("正在上传封面图...")
+            thumb_media_id = upload_thumb_media(access_token, thumb)
+            if not thumb_media_id:
+                raise RuntimeError("封面图上传失败")
+
+            articles = []
+            for md_file in files:
+                article = prepare_article(str(md_file), author=author, theme=theme)
+                if article is None:
+                    fail_list.append(md_file.name)
+                    continue
+                _print(f"文章标题: {article['title']}")
+                html_content = replace_images_in_html(access_token, article["html_content"])
+                articles.append(draft_article(
+                    article["title"], html_content, thumb_media_id,
+                    article["author"], article["digest"],
+                ))
+                names.append(md_file.name)
+
+            if articles:
+                _print(f"正在创建草稿（{len(articles)} 篇）...")
+                if create_drafts_batch(access_token, articles):
+                    success_list.extend(names)
+                else:
+                    fail_list.extend(names)
+        except Exception as e:
+            _print(f"操作出错: {e}")
+            fail_list.extend(
+                f.name for f in files if f.name not in fail_list and f.name not in success_list
+            )
+
+        # Delay between API calls to avoid rate limiting (skip after last)
+        if gidx < len(groups):
+            _print(f"等待 {delay}s 后继续...")
+            time.sleep(delay)
+
+
 def batch_publish(
     dir_path: str,
     publish: bool = False,
@@ -610,6 +866,7 @@ def batch_publish(
     author: str = "",
     theme: str = "blue",
     delay: int = 60,
+    group: int = 1,
 ):
     """Batch create drafts for all .md files in a directory.
 
@@ -620,6 +877,8 @@ def batch_publish(
         author: Author name for all articles
         theme: WeChat theme for styling
         delay: Seconds to wait between operations (avoid rate limiting)
+        group: Without publish, combine every `group` files into one
+            multi-article draft (one API call, one delay per group)
     """
     folder = Path(dir_path)
     if not folder.is_dir():
@@ -637,40 +896,50 @@ def batch_publish(
     _print(f"批量操作: 找到 {total} 篇 Markdown 文章")
     _print(f"模式: {mode}")
     _print(f"操作间隔: {delay}s")
+    if group > 1 and not publish:
+        _print(f"合并草稿: 每 {group} 篇合并为一个多图文草稿")
     _print(f"=" * 50)
 
-    # Verify config and token once before batch
-    config = _ensure_config()
-    token = get_access_token(config)
-    if not token:
-        _print("错误: 无法获取 access_token")
-        sys.exit(1)
-    _print("access_token 获取成功")
+    # Make sure credentials exist before the batch starts; the token itself is
+    # fetched (or taken from cache) by each article and refreshed on rejection
+    _ensure_config()
 
     success_list = []
     fail_list = []
 
-    for idx, md_file in enumerate(md_files, 1):
-        _print(f"\n[{idx}/{total}] {md_file.name}")
-        _print("-" * 40)
-
-        try:
-            ok = publish_article(
-                str(md_file), title=None, publish=publish,
-                thumb=thumb, author=author, theme=theme,
-            )
-            if ok:
-                success_list.append(md_file.name)
-            else:
-                fail_list.append(md_file.name)
-        except Exception as e:
-            _print(f"操作出错: {e}")
-            fail_list.append(md_file.name)
-
-        # Delay between operations to avoid rate limiting (skip after last)
-        if idx < total:
-            _print(f"等待 {delay}s 后继续...")
-            time.sleep(delay)
+    if group > 1 and not publish:
+        _batch_grouped_drafts(md_files, group, thumb, author, theme, delay, success_list, fail_list)
+    else:
+        # Convert article N+1 in the background while article N is uploading
+        # and during the rate-limit delay; uploads themselves stay sequential
+        with ThreadPoolExecutor(max_workers=1) as converter:
+            def prepare(path):
+                return converter.submit(prepare_article, str(path), author=author, theme=theme)
+
+            next_article = prepare(md_files[0])
+            for idx, md_file in enumerate(md_files, 1):
+                _print(f"\n[{idx}/{total}] {md_file.name}")
+                _print("-" * 40)
+
+                current, next_article = next_article, None
+                if idx < total:
+                    next_article = prepare(md_files[idx])
+
+                try:
+                    article = current.result()
+                    ok = article is not None and _upload_article(article, publish=publish, thumb=thumb)
+                    if ok:
+                        success_list.append(md_file.name)
+                    else:
+                        fail_list.append(md_file.name)
+                except Exception as e:
+                    _print(f"操作出错: {e}")
+                    fail_list.append(md_file.name)
+
+                # Delay between operations to avoid rate limiting (skip after last)
+                if idx < total:
+                    _print(f"等待 {delay}s 后继续...")
+                    time.sleep(delay)
 
     # Summary
     _print(f"\n{'=' * 50}")
@@ -703,6 +972,7 @@ def main():
   python publish.py --dir ./articles                     # 批量创建草稿
   python publish.py --dir ./articles --publish           # 批量创建草稿并发布
   python publish.py --dir ./articles --delay 30          # 批量操作，间隔 30s
+  python publish.py --dir ./articles --group 8          # 每 8 篇合并为一个多图文草稿
 
 注意:
   - 首次使用需要运行 --setup 配置 AppID 和 AppSecret
@@ -723,9 +993,16 @@ def main():
     parser.add_argument("--dir", help="批量操作：指定目录路径，处理该目录下所有 .md 文件")
     parser.add_argument("--delay", type=int, default=60,
                         help="批量操作时每篇文章间隔秒数 (默认: 60，即1分钟，避免被限流)")
+    parser.add_argument("--group", type=int, default=1, choices=range(1, 9), metavar="N",
+                        help="批量创建草稿时每 N 篇合并为一个多图文草稿 (1-8，默认: 1，即每篇单独草稿；"
+                             "与 --publish 同用时忽略)")
 
     args = parser.parse_args()
 
+    if requests is None:
+        _print("错误: 'requests' 未安装，请运行: pip install requests")
+        sys.exit(1)
+
     # Setup mode
     if args.setup:
         success = setup_config()
@@ -740,6 +1017,7 @@ def main():
             author=args.author,
             theme=args.theme,
             delay=args.delay,
+            group=args.group,
         )
         sys.exit(0)
 
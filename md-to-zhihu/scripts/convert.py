@@ -11,12 +11,22 @@ Usage:
 
 Dependencies:
     pip install markdown pygments beautifulsoup4
+    pip install lxml  # optional, faster HTML parsing
 """
 
 import argparse
+import functools
+import hashlib
+import os
 import re
+import shutil
+import string
 import sys
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from html import escape, unescape
 from pathlib import Path
+from types import MappingProxyType
 
 try:
     import markdown
@@ -30,18 +40,25 @@ except ImportError:
     sys.exit(1)
 
 try:
+    import pygments
     from pygments.formatters import HtmlFormatter
 except ImportError:
     print("Error: 'pygments' package not installed. Run: pip install pygments")
     sys.exit(1)
 
 try:
-    from bs4 import BeautifulSoup, Tag
+    import bs4
+    from bs4 import BeautifulSoup, FeatureNotFound, Tag
 except ImportError:
     print("Error: 'beautifulsoup4' package not installed. Run: pip install beautifulsoup4")
     sys.exit(1)
 
 
+SCRIPT_DIR = Path(__file__).parent
+# Converted output keyed by a BLAKE2b digest of input + options + converter
+CACHE_DIR = SCRIPT_DIR / ".zhihu_convert_cache"
+
+
 # ──────────────────────────────────────────────
 # Theme Definitions
 # ──────────────────────────────────────────────
@@ -164,10 +181,9 @@ THEMES = {
 # Style Generator
 # ──────────────────────────────────────────────
 
-def build_styles(theme_name: str = "zhihu") -> dict:
-    """Build a complete inline-styles dictionary from a theme."""
-    t = THEMES.get(theme_name, THEMES["zhihu"])
-    return {
+def _compute_styles(t: dict) -> MappingProxyType:
+    """Build a complete inline-styles dictionary from a theme definition."""
+    styles = {
         "container": (
             f"max-width: 100%;"
             f"font-family: {t['font_body']};"
@@ -360,173 +376,192 @@ def build_styles(theme_name: str = "zhihu") -> dict:
             f"font-weight: bold;"
         ),
     }
+    # Prebuilt code block shell: wrapper + header with the "traffic light"
+    # dots (left open for the language label), then the body opener
+    styles["code_block_head_html"] = (
+        f'<div style="{styles["code_block_wrapper"]}">'
+        f'<div style="{styles["code_block_header"]}">'
+        f'<div style="{styles["code_block_dots"]}">'
+        + "".join(
+            f'<span style="{styles["code_block_dot"]} background: {color};"></span>'
+            for color in ("#FF5F57", "#FEBC2E", "#28C840")
+        )
+        + "</div>"
+    )
+    styles["code_block_body_html"] = f'</div><div style="{styles["code_block_body"]}">'
+    # Theme-independent values (em, ul, ol, ...) become one shared object
+    return MappingProxyType({k: sys.intern(v) for k, v in styles.items()})
+
+
+# Style strings depend only on the theme, so every theme's table is built
+# once at import and shared (read-only, interned) by all callers. Tags styled
+# through BeautifulSoup reference one of these objects rather than a copy.
+_STYLES = {name: _compute_styles(t) for name, t in THEMES.items()}
+
+
+def build_styles(theme_name: str = "zhihu") -> MappingProxyType:
+    """Return the precomputed inline-styles mapping for a theme."""
+    return _STYLES.get(theme_name, _STYLES["zhihu"])
 
 
 # ──────────────────────────────────────────────
 # Markdown Pre-processing
 # ──────────────────────────────────────────────
 
+_TASK_RE = re.compile(r"^(\s*[-*])\s*\[([ x])\]\s+(.+)$", re.MULTILINE)
+_TITLE_LINE_RE = re.compile(r"#\s+(.+)\n*")
+
+def _task_item(m: re.Match) -> str:
+    """Render one task-list line matched by _TASK_RE."""
+    bullet, state, text = m.groups()
+    if state == "x":
+        return f'{bullet} <span class="task-done">\u2705 {text}</span>'
+    return f"{bullet} \u2B1C {text}"
+
+
 def preprocess_markdown(md_text: str) -> str:
     """Pre-process markdown for better compatibility."""
-    # Convert task lists: - [ ] and - [x]
-    md_text = re.sub(
-        r"^(\s*[-*])\s*\[x\]\s+(.+)$",
-        '\\1 <span class="task-done">\u2705 \\2</span>',
-        md_text, flags=re.MULTILINE
-    )
-    md_text = re.sub(
-        r"^(\s*[-*])\s*\[ \]\s+(.+)$",
-        "\\1 \u2B1C \\2",
-        md_text, flags=re.MULTILINE
-    )
-    return md_text
+    # Convert task lists: - [ ] and - [x], both in one pass
+    return _TASK_RE.sub(_task_item, md_text)
+
+
+def split_title(md_text: str) -> tuple[str, str]:
+    """Split markdown into (title, body) with a single match at the start.
+
+    A leading h1 heading is the title and is removed from the body;
+    otherwise the first non-empty line (truncated) is the title.
+    """
+    match = _TITLE_LINE_RE.match(md_text)
+    if match:
+        return match.group(1).strip(), md_text[match.end():].lstrip()
+    body = md_text.lstrip()
+    first_line = body.partition("\n")[0].strip()
+    return first_line[:100] or "Untitled", body
 
 
 def extract_title(md_text: str) -> str:
     """Extract title from first h1 heading."""
-    match = re.match(r"^#\s+(.+)", md_text, re.MULTILINE)
-    if match:
-        return match.group(1).strip()
-    for line in md_text.split("\n"):
-        line = line.strip()
-        if line:
-            return line[:100]
-    return "Untitled"
+    return split_title(md_text)[0]
 
 
 def remove_title(md_text: str) -> str:
     """Remove the first h1 heading from markdown (used as article title)."""
-    return re.sub(r"^#\s+.+\n*", "", md_text, count=1).lstrip()
+    return split_title(md_text)[1]
 
 
 # ──────────────────────────────────────────────
 # HTML Post-processing with BeautifulSoup
 # ──────────────────────────────────────────────
 
-def apply_styles(html: str, styles: dict, theme: dict) -> str:
-    """Apply inline styles to all HTML elements using BeautifulSoup."""
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_html(html: str) -> BeautifulSoup:
+    """Parse an HTML fragment, preferring lxml's C parser over html.parser."""
+    try:
+        return BeautifulSoup(html, "lxml")
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser")
 
-    # --- Headings ---
-    for tag_name in ["h1", "h2", "h3", "h4"]:
-        for tag in soup.find_all(tag_name):
-            tag["style"] = styles[tag_name]
 
-    # --- Paragraphs ---
-    for p in soup.find_all("p"):
-        if p.parent and p.parent.name == "blockquote":
-            p["style"] = styles["blockquote_p"]
-        else:
-            p["style"] = styles["p"]
-
-    # --- Inline formatting ---
-    for strong in soup.find_all("strong"):
-        strong["style"] = styles["strong"]
-    for em in soup.find_all("em"):
-        em["style"] = styles["em"]
-    for del_tag in soup.find_all("del"):
-        del_tag["style"] = styles["del"]
-
-    # --- Links (Zhihu supports clickable links!) ---
-    for a in soup.find_all("a"):
-        cls = a.get("class", [])
-        if "footnote-backref" in cls or "footnote-ref" in cls:
-            a["style"] = styles["footnote_ref"]
-        else:
-            a["style"] = styles["a"]
-
-    # --- Lists ---
-    for ul in soup.find_all("ul"):
-        ul["style"] = styles["ul"]
-    for ol in soup.find_all("ol"):
-        ol["style"] = styles["ol"]
-    for li in soup.find_all("li"):
-        li["style"] = styles["li"]
-
-    # --- Blockquotes ---
-    for bq in soup.find_all("blockquote"):
-        bq["style"] = styles["blockquote"]
-
-    # --- Code blocks (codehilite) ---
-    for div in soup.find_all("div", class_="codehilite"):
-        lang = ""
-        classes = div.get("class", [])
-        for cls in classes:
-            if cls.startswith("language-"):
-                lang = cls.replace("language-", "")
-
-        if not lang:
-            code_tag = div.find("code")
-            if code_tag:
-                code_classes = code_tag.get("class", [])
-                for cls in code_classes:
-                    if cls.startswith("language-"):
-                        lang = cls.replace("language-", "")
-
-        inner_html = div.decode_contents()
-
-        # Create styled wrapper
-        new_div = soup.new_tag("div")
-        new_div["style"] = styles["code_block_wrapper"]
-
-        # Header with dots + language label
-        header = soup.new_tag("div")
-        header["style"] = styles["code_block_header"]
-
-        dots_div = soup.new_tag("div")
-        dots_div["style"] = styles["code_block_dots"]
-        for color in ["#FF5F57", "#FEBC2E", "#28C840"]:
-            dot = soup.new_tag("span")
-            dot["style"] = styles["code_block_dot"] + f" background: {color};"
-            dots_div.append(dot)
-        header.append(dots_div)
-
-        if lang:
-            lang_span = soup.new_tag("span")
-            lang_span["style"] = styles["code_block_lang"]
-            lang_span.string = lang.upper()
-            header.append(lang_span)
-
-        new_div.append(header)
-
-        # Code body
-        body_div = soup.new_tag("div")
-        body_div["style"] = styles["code_block_body"]
-        body_div.append(BeautifulSoup(inner_html, "html.parser"))
-        new_div.append(body_div)
-
-        inner_pre = new_div.find("pre")
-        if inner_pre:
-            inner_pre["style"] = "margin: 0; padding: 0; background: transparent; overflow: visible;"
-
-        div.replace_with(new_div)
+def _fragment_root(soup: BeautifulSoup) -> Tag:
+    """Return the node holding the fragment (lxml wraps it in <html><body>)."""
+    return soup.body or soup
+
+
+# Tags whose style depends only on the tag name; these are styled with one
+# regex pass over the raw HTML instead of a find_all sweep per tag.
+_PLAIN_STYLE_TAGS = ("h1", "h2", "h3", "h4", "p", "strong", "em", "del",
+                     "ul", "ol", "li", "blockquote", "hr", "img")
+_PLAIN_TAG_RE = re.compile(
+    r"<(%s)((?:\s+[^\s/>][^>]*?)?)\s*(/?)>" % "|".join(_PLAIN_STYLE_TAGS),
+    re.IGNORECASE,
+)
+_STYLE_ATTR_RE = re.compile(r"""\s+style\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]*)""", re.IGNORECASE)
+
+
+def _inject_plain_styles(html: str, styles: dict) -> str:
+    """Set the theme style on every tag in _PLAIN_STYLE_TAGS in a single pass."""
+    def repl(m):
+        name, attrs, close = m.groups()
+        if "style" in attrs:
+            attrs = _STYLE_ATTR_RE.sub("", attrs)
+        return f'<{name}{attrs} style="{styles[name.lower()]}"{close}>'
+
+    return _PLAIN_TAG_RE.sub(repl, html)
+
+
+_CODEHILITE_BLOCK_RE = re.compile(
+    r'<div class="codehilite"[^>]*>\s*<pre[^>]*>(.*?)</pre>\s*</div>', re.DOTALL
+)
+_CODE_LANG_RE = re.compile(r'<code class="[^"]*?\blanguage-([^\s"]+)')
+
+
+# Highlighted code blocks are rendered on the string and kept out of the
+# parse tree behind these placeholders: their per-token <span>s would
+# otherwise dominate parse and serialization time. The placeholder is an
+# element, not a comment: lxml puts a comment that leads the document
+# outside <body>, where _fragment_root would drop it.
+_CODE_SLOT = '<code-slot data-i="%d"></code-slot>'
+_CODE_SLOT_RE = re.compile(r'<code-slot data-i="(\d+)"></code-slot>')
+
+
+def _styled_code_block(m: re.Match, styles) -> str:
+    """Render a codehilite block inside the themed wrapper with header and dots."""
+    inner = m.group(1)
+    lang = _CODE_LANG_RE.search(inner)
+    lang_html = (
+        f'<span style="{styles["code_block_lang"]}">{escape(lang.group(1).upper())}</span>'
+        if lang else ""
+    )
+    return "".join((
+        styles["code_block_head_html"],
+        lang_html,
+        styles["code_block_body_html"],
+        '<pre style="margin: 0; padding: 0; background: transparent; overflow: visible;">',
+        inner,
+        "</pre></div></div>",
+    ))
+
+
+# Markers of the tags handled by the context-dependent walk in apply_styles
+_WALK_PROBES = ("<blockquote", "<a ", "<code", "task-done", 'class="footnote"')
+
+
+def apply_styles(html: str, styles: dict, theme: dict) -> str:
+    """Apply inline styles to all HTML elements using BeautifulSoup."""
+    code_blocks = []
+    if 'class="codehilite"' in html:
+        def stash(m):
+            code_blocks.append(_styled_code_block(m, styles))
+            return _CODE_SLOT % (len(code_blocks) - 1)
+
+        html = _CODEHILITE_BLOCK_RE.sub(stash, html)
+
+    def restore(out):
+        if not code_blocks:
+            return out
+        return _CODE_SLOT_RE.sub(lambda m: code_blocks[int(m.group(1))], out)
+
+    # Cheap substring probes on the remaining HTML skip the passes (or the
+    # whole parse) for features the document does not use
+    has_pre = "<pre" in html
+    has_tables = "<table" in html
+    has_images = "<img" in html
+    needs_walk = any(probe in html for probe in _WALK_PROBES)
+
+    styled = _inject_plain_styles(html, styles)
+    if not (has_pre or has_tables or has_images or needs_walk):
+        return restore(styled)
+    soup = _parse_html(styled)
 
     # --- Bare <pre> blocks (non-highlighted) ---
-    for pre in soup.find_all("pre"):
-        if pre.parent and pre.parent.get("style", "").startswith("padding:"):
-            continue
-        wrapper = soup.new_tag("div")
-        wrapper["style"] = styles["code_block_wrapper"]
-        body = soup.new_tag("div")
-        body["style"] = styles["code_block_body"]
-        pre_copy = pre.extract()
-        pre_copy["style"] = "margin: 0; padding: 0; background: transparent; overflow: visible;"
-        body.append(pre_copy)
-        wrapper.append(body)
-        pre.insert_after(wrapper) if pre.parent else None
-
-    # --- Inline code ---
-    for code in soup.find_all("code"):
-        if code.parent and code.parent.name == "pre":
-            continue
-        if code.parent and code.parent.name == "div":
-            parent_style = code.parent.get("style", "")
-            if "overflow-x" in parent_style or "font-family" in parent_style:
-                continue
-        code["style"] = styles["code_inline"]
+    for pre in soup.find_all("pre") if has_pre else ():
+        # Wrap the existing <pre> in place (highlighted blocks never reach
+        # the tree, see _styled_code_block)
+        pre["style"] = "margin: 0; padding: 0; background: transparent; overflow: visible;"
+        body = pre.wrap(soup.new_tag("div", attrs={"style": styles["code_block_body"]}))
+        body.wrap(soup.new_tag("div", attrs={"style": styles["code_block_wrapper"]}))
 
     # --- Tables ---
-    for table in soup.find_all("table"):
+    for table in soup.find_all("table") if has_tables else ():
         wrapper = soup.new_tag("div")
         wrapper["style"] = styles["table_wrapper"]
         table["style"] = styles["table"]
@@ -539,161 +574,173 @@ def apply_styles(html: str, styles: dict, theme: dict) -> str:
                     td["style"] = styles["td_even"] if i % 2 == 1 else styles["td"]
         table.wrap(wrapper)
 
-    # --- Horizontal rules ---
-    for hr in soup.find_all("hr"):
-        hr["style"] = styles["hr"]
-
     # --- Images ---
-    for img in soup.find_all("img"):
-        img["style"] = styles["img"]
-        alt = img.get("alt", "").strip()
+    for img in soup.find_all("img", alt=True) if has_images else ():
+        alt = img["alt"].strip()
         if alt and alt.lower() not in ("image", "img", ""):
             caption = soup.new_tag("p")
             caption["style"] = styles["img_caption"]
             caption.string = alt
             img.insert_after(caption)
 
-    # --- Task list done items ---
-    for span in soup.find_all("span", class_="task-done"):
-        span["style"] = styles["task_done"]
-
-    # --- Footnote section ---
-    for div in soup.find_all("div", class_="footnote"):
-        div["style"] = styles["footnote_section"]
-        for hr_in_fn in div.find_all("hr"):
-            hr_in_fn.decompose()
-
-    return str(soup)
+    # --- Context-dependent styles, in one walk over the final tree ---
+    for el in _fragment_root(soup).find_all(True) if needs_walk else ():
+        name = el.name
+        parent = el.parent
+        if name == "p":
+            # Quoted paragraphs (the rest were styled by _inject_plain_styles)
+            if parent and parent.name == "blockquote":
+                el["style"] = styles["blockquote_p"]
+        elif name == "a":
+            # Links (Zhihu supports clickable links!)
+            cls = el.get("class", [])
+            if "footnote-backref" in cls or "footnote-ref" in cls:
+                el["style"] = styles["footnote_ref"]
+            else:
+                el["style"] = styles["a"]
+        elif name == "code":
+            # Inline code: skip code inside <pre> or a code block body
+            if parent and parent.name == "pre":
+                continue
+            if parent and parent.name == "div":
+                parent_style = parent.get("style", "")
+                if "overflow-x" in parent_style or "font-family" in parent_style:
+                    continue
+            el["style"] = styles["code_inline"]
+        elif name == "span":
+            # Task list done items
+            if "task-done" in el.get("class", []):
+                el["style"] = styles["task_done"]
+        elif name == "div":
+            # Footnote section
+            if "footnote" in el.get("class", []):
+                el["style"] = styles["footnote_section"]
+                for hr_in_fn in el.find_all("hr"):
+                    hr_in_fn.decompose()
+
+    return restore(_fragment_root(soup).decode_contents())
 
 
 # ──────────────────────────────────────────────
 # Content Converter (clean HTML for Zhihu API)
 # ──────────────────────────────────────────────
 
-def convert_to_zhihu_content(md_content: str) -> str:
-    """Convert markdown to clean HTML suitable for Zhihu article content.
-    
-    Returns HTML without excessive inline styles - Zhihu applies its own styling.
-    This is used by the publisher for API-based article creation.
-    """
-    md_content = preprocess_markdown(md_content)
-    md_content = remove_title(md_content)
+@functools.lru_cache(maxsize=16)
+def _markdown_parser(pygments_style: str) -> markdown.Markdown:
+    """Return a shared Markdown parser highlighting code with a Pygments style.
 
+    Building the extension pipeline is costly, so parsers are reused;
+    callers must ``reset()`` before each conversion.
+    """
     extensions = [
         TableExtension(),
         FencedCodeExtension(),
         FootnoteExtension(),
         TocExtension(permalink=False),
         CodeHiliteExtension(
+            pygments_style=pygments_style,
             noclasses=True,
             linenums=False,
-            guess_lang=True,
-            pygments_style="monokai",
+            # Untagged blocks render as plain text rather than running
+            # every Pygments analyser to guess a lexer
+            guess_lang=False,
         ),
     ]
+    return markdown.Markdown(extensions=extensions)
+
+
+def _plain_code_block(m: re.Match) -> str:
+    """Rewrite a codehilite block to the Zhihu-friendly <pre><code> structure."""
+    inner = m.group(1)
+    lang = _CODE_LANG_RE.search(inner)
+    cls = f' class="language-{lang.group(1)}"' if lang else ""
+    return f"<pre><code{cls}>{inner}</code></pre>"
+
 
-    md_parser = markdown.Markdown(extensions=extensions)
+# An image alone in its paragraph (the figure replaces the <p>), or any
+# other image not already inside a <figure>
+_BARE_IMG_RE = re.compile(
+    r"<p>\s*(<img\b[^>]*>)\s*</p>|(?<!<figure>)(<img\b[^>]*>)", re.IGNORECASE
+)
+_ALT_RE = re.compile(r'\balt="([^"]*)"')
+
+
+def _figure(m: re.Match) -> str:
+    """Wrap an <img> in a <figure>, captioned with its alt text."""
+    img = m.group(1) or m.group(2)
+    alt = _ALT_RE.search(img)
+    alt = unescape(alt.group(1)).strip() if alt else ""
+    if alt and alt.lower() not in ("image", "img"):
+        return f"<figure>{img}<figcaption>{escape(alt, quote=False)}</figcaption></figure>"
+    return f"<figure>{img}</figure>"
+
+
+def convert_to_zhihu_content(md_content: str) -> str:
+    """Convert markdown to clean HTML suitable for Zhihu article content.
+    
+    Returns HTML without excessive inline styles - Zhihu applies its own styling.
+    This is used by the publisher for API-based article creation.
+    """
+    md_content = preprocess_markdown(md_content)
+    md_content = remove_title(md_content)
+
+    md_parser = _markdown_parser("monokai")
+    md_parser.reset()
     html = md_parser.convert(md_content)
 
-    # Light post-processing for Zhihu compatibility
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Ensure code blocks use Zhihu-friendly structure
-    for div in soup.find_all("div", class_="codehilite"):
-        lang = ""
-        code_tag = div.find("code")
-        if code_tag:
-            for cls in code_tag.get("class", []):
-                if cls.startswith("language-"):
-                    lang = cls.replace("language-", "")
-
-        pre = div.find("pre")
-        if pre:
-            new_pre = soup.new_tag("pre")
-            new_code = soup.new_tag("code")
-            if lang:
-                new_code["class"] = [f"language-{lang}"]
-            new_code.append(BeautifulSoup(pre.decode_contents(), "html.parser"))
-            new_pre.append(new_code)
-            div.replace_with(new_pre)
-
-    # Ensure images are wrapped in figure tags for Zhihu
-    for img in soup.find_all("img"):
-        if img.parent and img.parent.name != "figure":
-            figure = soup.new_tag("figure")
-            img_copy = img.extract()
-            figure.append(img_copy)
-            alt = img_copy.get("alt", "").strip()
-            if alt and alt.lower() not in ("image", "img", ""):
-                figcaption = soup.new_tag("figcaption")
-                figcaption.string = alt
-                figure.append(figcaption)
-            img.insert_after(figure) if img.parent else soup.append(figure)
-
-    return str(soup)
+    # Light post-processing for Zhihu compatibility, done on the string:
+    # Zhihu-friendly code block structure, images wrapped in <figure>
+    html = _CODEHILITE_BLOCK_RE.sub(_plain_code_block, html)
+    if "<img" in html:
+        html = _BARE_IMG_RE.sub(_figure, html)
+    return html
 
 
 # ──────────────────────────────────────────────
 # Preview Converter (styled HTML with themes)
 # ──────────────────────────────────────────────
 
-def convert_to_preview(md_content: str, theme_name: str = "zhihu") -> str:
-    """Convert markdown to a full preview HTML page with inline styles and copy functionality."""
+def _convert_preview_body(md_content: str, theme_name: str) -> tuple[str, str]:
+    """Convert markdown to (title, inline-styled body HTML) for the preview page."""
     t = THEMES.get(theme_name, THEMES["zhihu"])
     styles = build_styles(theme_name)
 
-    title = extract_title(md_content)
-    md_body = remove_title(md_content)
+    title, md_body = split_title(md_content)
     md_body = preprocess_markdown(md_body)
 
-    extensions = [
-        TableExtension(),
-        FencedCodeExtension(),
-        FootnoteExtension(),
-        TocExtension(permalink=False),
-        CodeHiliteExtension(
-            pygments_style=t["pygments_style"],
-            noclasses=True,
-            linenums=False,
-            guess_lang=True,
-        ),
-    ]
-
-    md_parser = markdown.Markdown(extensions=extensions)
+    md_parser = _markdown_parser(t["pygments_style"])
+    md_parser.reset()
     raw_html = md_parser.convert(md_body)
-    styled_html = apply_styles(raw_html, styles, t)
-
-    return build_document(title, styled_html, styles, t, theme_name)
+    return title, apply_styles(raw_html, styles, t)
 
 
-def build_document(title: str, body_html: str, styles: dict, theme: dict, theme_name: str) -> str:
-    """Generate a complete HTML document with copy-to-clipboard and preview frame."""
-    primary = theme["primary"]
-    font = theme["font_body"]
+def convert_to_preview(md_content: str, theme_name: str = "zhihu") -> str:
+    """Convert markdown to a full preview HTML page with inline styles and copy functionality."""
+    title, body_html = _convert_preview_body(md_content, theme_name)
+    return "".join(iter_document(title, body_html, theme_name))
 
-    # Build theme selector options
-    theme_options = ""
-    for key, val in THEMES.items():
-        selected = "selected" if key == theme_name else ""
-        theme_options += f'<option value="{key}" {selected}>{val["name"]} ({key})</option>\n'
 
-    return f"""<!DOCTYPE html>
+# Preview shell around the article, split where the title, the theme
+# selector and the body are spliced in.
+_DOCUMENT_HEAD = """<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>知乎文章预览 - {title}</title>
+    <title>知乎文章预览 - """
+
+_DOCUMENT_STYLE = string.Template("""</title>
     <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
             background: #F6F7F8;
             display: flex;
             flex-direction: column;
             align-items: center;
             padding: 20px;
-            font-family: {font};
-        }}
-        .toolbar {{
+            font-family: $font;
+        }
+        .toolbar {
             position: sticky;
             top: 0;
             z-index: 100;
@@ -708,9 +755,9 @@ def build_document(title: str, body_html: str, styles: dict, theme: dict, theme_
             flex-wrap: wrap;
             max-width: 750px;
             width: 100%;
-        }}
-        .toolbar button {{
-            background: {primary};
+        }
+        .toolbar button {
+            background: $primary;
             color: #fff;
             border: none;
             padding: 10px 24px;
@@ -720,62 +767,62 @@ def build_document(title: str, body_html: str, styles: dict, theme: dict, theme_
             font-weight: 500;
             transition: all 0.2s;
             box-shadow: 0 2px 6px rgba(0,0,0,0.12);
-        }}
-        .toolbar button:hover {{
+        }
+        .toolbar button:hover {
             opacity: 0.9;
             transform: translateY(-1px);
             box-shadow: 0 4px 10px rgba(0,0,0,0.15);
-        }}
-        .toolbar button:active {{ transform: translateY(0); }}
-        .toolbar .hint {{
+        }
+        .toolbar button:active { transform: translateY(0); }
+        .toolbar .hint {
             color: #888;
             font-size: 13px;
-        }}
-        .toolbar .status {{
+        }
+        .toolbar .status {
             font-size: 13px;
             font-weight: 500;
             transition: opacity 0.3s;
-        }}
-        .toolbar select {{
+        }
+        .toolbar select {
             padding: 8px 12px;
             border: 1px solid #ddd;
             border-radius: 6px;
             font-size: 13px;
             cursor: pointer;
             background: #fff;
-        }}
-        .article-frame {{
+        }
+        .article-frame {
             background: #fff;
             max-width: 750px;
             width: 100%;
             border-radius: 4px;
             box-shadow: 0 1px 3px rgba(26,26,26,0.1);
             overflow: hidden;
-        }}
-        .article-header {{
+        }
+        .article-header {
             padding: 32px 24px 0;
-        }}
-        .article-title {{
+        }
+        .article-title {
             font-size: 24px;
             font-weight: 600;
             color: #1A1A1A;
             line-height: 1.4;
             margin-bottom: 16px;
-        }}
-        .article-meta {{
+        }
+        .article-meta {
             font-size: 14px;
             color: #8590A6;
             padding-bottom: 16px;
             border-bottom: 1px solid #F0F2F7;
-        }}
-        .article-content {{
+        }
+        .article-content {
             padding: 24px;
-        }}
-        #content {{
-            font-family: {font};
-        }}
-        #content pre {{ background: transparent !important; }}
-        .zhihu-badge {{
+        }
+        #content {
+            font-family: $font;
+        }
+        #content pre { background: transparent !important; }
+        .zhihu-badge {
             display: inline-flex;
             align-items: center;
             gap: 6px;
@@ -784,25 +831,29 @@ def build_document(title: str, body_html: str, styles: dict, theme: dict, theme_
             border-radius: 4px;
             font-size: 12px;
             color: #8590A6;
-        }}
-        .zhihu-badge svg {{
+        }
+        .zhihu-badge svg {
             width: 16px;
             height: 16px;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="toolbar">
         <button onclick="copyContent()">复制内容到剪贴板</button>
         <select onchange="switchTheme(this.value)" title="切换主题">
-            {theme_options}
+            """)
+
+_DOCUMENT_HEADER = """
         </select>
         <span class="hint">复制后粘贴到知乎编辑器</span>
         <span class="status" id="status"></span>
     </div>
     <div class="article-frame">
         <div class="article-header">
-            <h1 class="article-title">{title}</h1>
+            <h1 class="article-title">"""
+
+_DOCUMENT_CONTENT = string.Template("""</h1>
             <div class="article-meta">
                 <span class="zhihu-badge">
                     <svg viewBox="0 0 24 24" fill="#0066FF"><path d="M5.721 0C2.251 0 0 2.25 0 5.719V18.28C0 21.751 2.252 24 5.721 24h12.56C21.751 24 24 21.75 24 18.281V5.72C24 2.249 21.75 0 18.281 0zm1.964 4.078h6.46l.09 1.252h-3.85l-.5 3.797h3.478c0 0-.074 5.089-.26 6.291-.186 1.201-.54 1.862-1.1 2.254-.56.392-1.17.54-2.07.576-.598.024-1.597.009-1.597.009l-.32-1.473s.985.03 1.564.009c.579-.021.913-.1 1.177-.345.264-.246.383-.702.45-1.36.068-.659.194-4.508.194-4.508H9.273l-.658 8.67H7.17l.66-8.67H5.504V9.127h2.465l.5-3.797H6.05z"/></svg>
@@ -811,63 +862,182 @@ def build_document(title: str, body_html: str, styles: dict, theme: dict, theme_
             </div>
         </div>
         <div class="article-content">
-            <div id="content" style="{styles['container']}">
-{body_html}
+            <div id="content" style="$container_style">
+""")
+
+_DOCUMENT_TAIL = """
             </div>
         </div>
     </div>
     <script>
-        function copyContent() {{
+        function copyContent() {
             const content = document.getElementById('content');
             const range = document.createRange();
             range.selectNodeContents(content);
             const sel = window.getSelection();
             sel.removeAllRanges();
             sel.addRange(range);
-            try {{
+            try {
                 document.execCommand('copy');
                 showStatus('\u2705 已复制！可直接粘贴到知乎文章编辑器', '#52C41A');
-            }} catch (e) {{
+            } catch (e) {
                 showStatus('\u274c 复制失败，请手动 Ctrl+A 全选后复制', '#F5222D');
-            }}
+            }
             sel.removeAllRanges();
-        }}
-        function showStatus(msg, color) {{
+        }
+        function showStatus(msg, color) {
             const el = document.getElementById('status');
             el.textContent = msg;
             el.style.color = color;
-            setTimeout(() => {{
+            setTimeout(() => {
                 el.style.opacity = '0';
-                setTimeout(() => {{ el.textContent = ''; el.style.opacity = '1'; }}, 300);
-            }}, 3000);
-        }}
-        function switchTheme(theme) {{
+                setTimeout(() => { el.textContent = ''; el.style.opacity = '1'; }, 300);
+            }, 3000);
+        }
+        function switchTheme(theme) {
             const url = new URL(window.location.href);
             // Reload page can't change server-rendered theme, so we just hint the user
             showStatus('请重新运行转换命令并添加 --theme ' + theme, '#0066FF');
-        }}
+        }
     </script>
 </body>
 </html>"""
 
 
+# Theme selector markup for each possible current theme (None: unknown name,
+# nothing selected)
+_THEME_OPTIONS = {
+    current: "".join(
+        f'<option value="{key}" {"selected" if key == current else ""}>{val["name"]} ({key})</option>\n'
+        for key, val in THEMES.items()
+    )
+    for current in (*THEMES, None)
+}
+
+
+def _render_document_shell(styles, theme: dict) -> tuple[str, str]:
+    """Render the theme-dependent parts of the preview shell."""
+    return (
+        _DOCUMENT_STYLE.substitute(font=theme["font_body"], primary=theme["primary"]),
+        _DOCUMENT_CONTENT.substitute(container_style=styles["container"]),
+    )
+
+
+# The shell around the article depends only on the theme.
+_DOCUMENT_SHELLS = {
+    name: _render_document_shell(_STYLES[name], t) for name, t in THEMES.items()
+}
+
+
+def _iter_shell(title: str, body_html: str, shell: tuple[str, str], theme_name: str) -> Iterator[str]:
+    """Yield the preview document segments for a rendered theme shell."""
+    style, content = shell
+    yield _DOCUMENT_HEAD
+    yield title
+    yield style
+    yield _THEME_OPTIONS.get(theme_name, _THEME_OPTIONS[None])
+    yield _DOCUMENT_HEADER
+    yield title
+    yield content
+    yield body_html
+    yield _DOCUMENT_TAIL
+
+
+def iter_document(title: str, body_html: str, theme_name: str = "zhihu") -> Iterator[str]:
+    """Yield the preview document around the article body in segments."""
+    shell = _DOCUMENT_SHELLS.get(theme_name) or _DOCUMENT_SHELLS["zhihu"]
+    return _iter_shell(title, body_html, shell, theme_name)
+
+
+_DOCUMENT_SHELLS_UTF8 = {
+    name: tuple(part.encode("utf-8") for part in shell) for name, shell in _DOCUMENT_SHELLS.items()
+}
+_THEME_OPTIONS_UTF8 = {name: options.encode("utf-8") for name, options in _THEME_OPTIONS.items()}
+_DOCUMENT_HEAD_UTF8 = _DOCUMENT_HEAD.encode("utf-8")
+_DOCUMENT_HEADER_UTF8 = _DOCUMENT_HEADER.encode("utf-8")
+_DOCUMENT_TAIL_UTF8 = _DOCUMENT_TAIL.encode("utf-8")
+
+
+def iter_document_bytes(title: str, body_html: str, theme_name: str = "zhihu") -> Iterator[bytes]:
+    """Like iter_document(), as UTF-8 bytes with the shell pre-encoded."""
+    style, content = _DOCUMENT_SHELLS_UTF8.get(theme_name) or _DOCUMENT_SHELLS_UTF8["zhihu"]
+    title_utf8 = title.encode("utf-8")
+    yield _DOCUMENT_HEAD_UTF8
+    yield title_utf8
+    yield style
+    yield _THEME_OPTIONS_UTF8.get(theme_name, _THEME_OPTIONS_UTF8[None])
+    yield _DOCUMENT_HEADER_UTF8
+    yield title_utf8
+    yield content
+    yield body_html.encode("utf-8")
+    yield _DOCUMENT_TAIL_UTF8
+
+
+def build_document(title: str, body_html: str, styles: dict, theme: dict, theme_name: str) -> str:
+    """Generate a complete HTML document with copy-to-clipboard and preview frame."""
+    shell = _render_document_shell(styles, theme)
+    return "".join(_iter_shell(title, body_html, shell, theme_name))
+
+
 # ──────────────────────────────────────────────
 # CLI Entry Point
 # ──────────────────────────────────────────────
 
+# UTF-8 stdout for Windows consoles, opened once (closefd=False keeps the
+# real stdout open when this handle is collected)
+try:
+    _OUT = open(sys.stdout.fileno(), "w", encoding="utf-8", errors="replace",
+                buffering=1, closefd=False)
+except Exception:
+    _OUT = None
+
+
 def _out(msg: str):
     """Print with UTF-8 encoding for Windows compatibility."""
-    import io
     try:
-        out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace", line_buffering=True)
-        out.write(msg + "\n")
-        out.flush()
-        out.detach()
+        _OUT.write(msg + "\n")
     except Exception:
         print(msg)
 
 
-def convert_single(input_path: Path, output_path: Path | None, theme: str, content_only: bool):
+@functools.lru_cache(maxsize=1)
+def _cache_salt() -> bytes:
+    """Digest of everything besides the input that shapes the output."""
+    h = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=16)
+    h.update(f"{markdown.__version__}|{pygments.__version__}|{bs4.__version__}".encode())
+    # lxml and html.parser serialize differently, so installing or removing
+    # lxml must not keep serving output built with the other backend
+    backend = _parse_html("").builder.NAME
+    h.update(f"|{backend}".encode())
+    if backend == "lxml":
+        from lxml import etree
+        h.update(f"|{etree.__version__}|{etree.LIBXML_VERSION}".encode())
+    return h.digest()
+
+
+def _cache_key(md_bytes: bytes, theme: str, content_only: bool) -> str:
+    """Cache file name for one input/options combination."""
+    h = hashlib.blake2b(md_bytes, digest_size=16)
+    h.update(b"\0content" if content_only else b"\0preview\0" + theme.encode())
+    h.update(_cache_salt())
+    return h.hexdigest()
+
+
+def _list_markdown_files(dir_path: Path) -> list[Path]:
+    """Sorted .md files directly inside dir_path.
+
+    os.scandir hands back names and cached file types in one pass; the bare
+    names are sorted (normcase keeps Windows' case-insensitive order) and
+    only then joined into Path objects.
+    """
+    with os.scandir(dir_path) as it:
+        names = [e.name for e in it if e.name.endswith(".md") and e.is_file()]
+    names.sort(key=os.path.normcase)
+    return [dir_path / name for name in names]
+
+
+def convert_single(input_path: Path, output_path: Path | None, theme: str, content_only: bool,
+                   use_cache: bool = True):
     """Convert a single markdown file. Returns output path."""
     if not input_path.exists():
         _out(f"错误: 文件不存在: {input_path}")
@@ -877,14 +1047,37 @@ def convert_single(input_path: Path, output_path: Path | None, theme: str, conte
     if not output_path:
         output_path = input_path.with_name(f"{input_path.stem}{suffix}")
 
-    md_content = input_path.read_text(encoding="utf-8")
+    md_bytes = input_path.read_bytes()
+    cache_path = None
+    if use_cache:
+        cache_path = CACHE_DIR / f"{_cache_key(md_bytes, theme, content_only)}.html"
+        try:
+            shutil.copyfile(cache_path, output_path)
+            return output_path
+        except OSError:
+            pass  # Not cached yet (or unreadable): convert below
+
+    # Fold CRLF so the line-anchored title pattern never captures "\r"
+    md_content = md_bytes.decode("utf-8").replace("\r\n", "\n")
 
     if content_only:
-        html_content = convert_to_zhihu_content(md_content)
+        chunks = (convert_to_zhihu_content(md_content).encode("utf-8"),)
     else:
-        html_content = convert_to_preview(md_content, theme)
-
-    output_path.write_text(html_content, encoding="utf-8")
+        # The preview shell and body are written in segments, never joined
+        title, body_html = _convert_preview_body(md_content, theme)
+        chunks = iter_document_bytes(title, body_html, theme)
+
+    with open(output_path, "wb") as f:
+        f.writelines(chunks)
+
+    if cache_path is not None:
+        try:
+            CACHE_DIR.mkdir(exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            shutil.copyfile(output_path, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # The cache is best-effort
     return output_path
 
 
@@ -900,6 +1093,7 @@ def main():
   python convert.py article.md --content-only      # 仅输出纯净 HTML
   python convert.py --dir ./articles               # 批量转换目录下所有 .md
   python convert.py --dir ./articles --theme warm  # 批量转换，温暖橙主题
+  python convert.py --dir ./articles --jobs 1      # 批量转换，单进程（便于调试）
         """,
     )
     parser.add_argument("input", nargs="?", help="输入 Markdown 文件路径")
@@ -919,6 +1113,17 @@ def main():
         "--dir",
         help="批量转换：指定目录路径，转换该目录下所有 .md 文件",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="批量转换的并行进程数 (默认: CPU 核数，1 为串行)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用转换缓存，强制重新转换",
+    )
 
     args = parser.parse_args()
 
@@ -931,7 +1136,7 @@ def main():
             _out(f"错误: 目录不存在: {dir_path}")
             sys.exit(1)
 
-        md_files = sorted(dir_path.glob("*.md"))
+        md_files = _list_markdown_files(dir_path)
         if not md_files:
             _out(f"目录下没有找到 .md 文件: {dir_path}")
             sys.exit(1)
@@ -940,10 +1145,22 @@ def main():
         _out(f"主题: {theme['name']}")
         _out("-" * 50)
 
+        n = len(md_files)
+        jobs = max(1, min(args.jobs, n))
+        if jobs == 1:
+            results = [
+                convert_single(md_file, None, args.theme, args.content_only, not args.no_cache)
+                for md_file in md_files
+            ]
+        else:
+            # Each file is independent CPU-bound work: fan out across processes
+            with ProcessPoolExecutor(max_workers=jobs) as ex:
+                results = list(ex.map(convert_single, md_files, [None] * n, [args.theme] * n,
+                                      [args.content_only] * n, [not args.no_cache] * n))
+
         success = 0
         failed = 0
-        for md_file in md_files:
-            out_path = convert_single(md_file, None, args.theme, args.content_only)
+        for md_file, out_path in zip(md_files, results):
             if out_path:
                 _out(f"  [OK] {md_file.name} -> {out_path.name}")
                 success += 1
@@ -962,7 +1179,7 @@ def main():
 
     input_path = Path(args.input)
     output_path = Path(args.output) if args.output else None
-    result = convert_single(input_path, output_path, args.theme, args.content_only)
+    result = convert_single(input_path, output_path, args.theme, args.content_only, not args.no_cache)
 
     if not result:
         sys.exit(1)
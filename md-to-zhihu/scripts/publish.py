@@ -15,15 +15,43 @@ Usage:
 Dependencies:
     pip install playwright requests
     playwright install chromium
+    pip install orjson  # optional, faster cookie file load/save
 """
 
 import argparse
+import functools
 import json
+import os
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# requests is only needed for the API path; it is bound once here and a
+# missing install is reported where it is first needed
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+# The cookie file is read on every run and rewritten after each login;
+# orjson works on bytes directly, skipping the text-encoding layer
+try:
+    import orjson
+
+    def _json_dump_file(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dump_file(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+    _json_loads = json.loads
+
 SCRIPT_DIR = Path(__file__).parent
 COOKIE_FILE = SCRIPT_DIR / ".zhihu_cookies.json"
 
@@ -37,7 +65,7 @@ sys.path.insert(0, str(SCRIPT_DIR))
 
 def save_cookies(cookies: list):
     """Save browser cookies to file."""
-    COOKIE_FILE.write_text(json.dumps(cookies, ensure_ascii=False, indent=2), encoding="utf-8")
+    COOKIE_FILE.write_bytes(_json_dump_file(cookies))
     _print(f"Cookie 已保存到: {COOKIE_FILE}")
 
 
@@ -45,43 +73,45 @@ def load_cookies() -> list | None:
     """Load cookies from file, return None if not found."""
     if COOKIE_FILE.exists():
         try:
-            return json.loads(COOKIE_FILE.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, IOError):
+            return _json_loads(COOKIE_FILE.read_bytes())
+        except (ValueError, IOError):  # orjson's and json's decode errors are ValueErrors
             return None
     return None
 
 
-def get_xsrf_token(cookies: list) -> str | None:
-    """Extract _xsrf token from cookies."""
-    for cookie in cookies:
-        if cookie.get("name") == "_xsrf":
-            return cookie.get("value")
-    return None
-
+def cookie_auth(cookies: list) -> dict:
+    """Build the auth headers for API calls from a Playwright cookie list.
 
-def cookies_to_dict(cookies: list) -> dict:
-    """Convert Playwright cookie list to requests-compatible dict."""
-    return {c["name"]: c["value"] for c in cookies}
-
-
-def cookies_to_header(cookies: list) -> str:
-    """Convert Playwright cookie list to Cookie header string."""
-    return "; ".join(f'{c["name"]}={c["value"]}' for c in cookies)
+    One pass yields the Cookie header and, when present, the _xsrf token as
+    x-xsrftoken.
+    """
+    pairs = []
+    xsrf = None
+    for c in cookies:
+        pairs.append(f'{c["name"]}={c["value"]}')
+        if xsrf is None and c["name"] == "_xsrf":
+            xsrf = c["value"]
+    auth = {"Cookie": "; ".join(pairs)}
+    if xsrf:
+        auth["x-xsrftoken"] = xsrf
+    return auth
 
 
 # ──────────────────────────────────────────────
 # Login
 # ──────────────────────────────────────────────
 
+@functools.lru_cache(maxsize=None)
 def _get_user_data_dir() -> Path:
-    """Get persistent browser profile directory for Zhihu login."""
+    """Get persistent browser profile directory for Zhihu login (created once per run)."""
     profile_dir = SCRIPT_DIR / ".zhihu_browser_profile"
     profile_dir.mkdir(exist_ok=True)
     return profile_dir
 
 
+@functools.lru_cache(maxsize=None)
 def _find_real_browser() -> str | None:
-    """Find the real Chrome or Edge executable on the system."""
+    """Find the real Chrome or Edge executable on the system (probed once per run)."""
     import shutil
 
     candidates = [
@@ -106,6 +136,37 @@ def _find_real_browser() -> str | None:
     return None
 
 
+def _wait_for_debug_port(port: int, timeout: float = 20) -> float | None:
+    """Wait for a local browser's remote-debugging port to accept connections.
+
+    Returns the seconds waited, or None on timeout. Probes back off from 10ms,
+    doubling up to 500ms, so a fast start is noticed in well under a second.
+    """
+    import socket
+
+    started = time.monotonic()
+    deadline = started + timeout
+    backoff = 0.01
+    while time.monotonic() < deadline:
+        # A socket cannot be reused after a failed connect, so each probe
+        # needs its own
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.1)
+            if s.connect_ex(("localhost", port)) == 0:
+                return time.monotonic() - started
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 0.5)
+    return None
+
+
+def _is_past_login(url: str) -> bool:
+    """True once the browser has left Zhihu's sign-in and security-check pages."""
+    return ("signin" not in url
+            and "sign-in" not in url
+            and "unhuman" not in url
+            and "zhihu.com" in url)
+
+
 def login():
     """Login to Zhihu using the real Chrome/Edge browser via CDP.
 
@@ -116,7 +177,7 @@ def login():
     import subprocess as sp
 
     try:
-        from playwright.sync_api import sync_playwright
+        from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
     except ImportError:
         _print("错误: playwright 未安装。请运行: pip install playwright && playwright install chromium")
         sys.exit(1)
@@ -150,13 +211,9 @@ def login():
 
     # Wait for browser to fully start and open debug port
     _print("等待浏览器启动...")
-    import socket
-    for i in range(20):
-        time.sleep(1)
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            if s.connect_ex(("localhost", debug_port)) == 0:
-                _print(f"调试端口已就绪 (等待 {i+1}s)")
-                break
+    waited = _wait_for_debug_port(debug_port)
+    if waited is not None:
+        _print(f"调试端口已就绪 (等待 {waited:.1f}s)")
     else:
         _print(f"浏览器调试端口未能启动。")
         _print(f"可能原因：已有其他 {browser_name} 使用相同 profile 目录。")
@@ -191,39 +248,42 @@ def login():
 
         context = browser.contexts[0]
 
-        # Poll for login success
+        # Wait for login success
         max_wait = 300  # 5 minutes
-        start_time = time.time()
+        deadline = time.monotonic() + max_wait
 
-        while time.time() - start_time < max_wait:
-            time.sleep(4)
+        while time.monotonic() < deadline:
             try:
                 # Find the active page
                 pages = context.pages
                 if not pages:
+                    time.sleep(1)
                     continue
                 page = pages[-1]
-                current_url = page.url
 
-                # Check if user has navigated past login/security pages
-                if ("signin" not in current_url
-                    and "sign-in" not in current_url
-                    and "unhuman" not in current_url
-                    and "zhihu.com" in current_url):
-                    time.sleep(3)
-                    cookies = context.cookies()
-                    has_auth = any(c["name"] == "z_c0" for c in cookies)
-                    if has_auth:
-                        save_cookies(cookies)
-                        _print("\n登录成功！Cookie 已保存。")
-                        try:
-                            browser.close()
-                        except Exception:
-                            pass
-                        chrome_proc.terminate()
-                        return True
+                # Block on the page's navigation until it is past the
+                # login/security pages; give up every few seconds to pick up
+                # a tab the user may have switched to
+                try:
+                    page.wait_for_url(_is_past_login, wait_until="commit", timeout=4000)
+                except PlaywrightTimeoutError:
+                    continue
+
+                time.sleep(3)
+                cookies = context.cookies()
+                has_auth = any(c["name"] == "z_c0" for c in cookies)
+                if has_auth:
+                    save_cookies(cookies)
+                    _print("\n登录成功！Cookie 已保存。")
+                    try:
+                        browser.close()
+                    except Exception:
+                        pass
+                    chrome_proc.terminate()
+                    return True
             except Exception:
-                pass
+                # e.g. the page closed mid-wait; don't spin on it
+                time.sleep(1)
 
         _print("\n登录超时（5分钟），请重试。")
         try:
@@ -238,23 +298,39 @@ def login():
 # API-based Publishing
 # ──────────────────────────────────────────────
 
+@functools.lru_cache(maxsize=None)
+def _http():
+    """Return the shared HTTP session (keep-alive connection pool + retries)."""
+    # Retry only covers idempotent methods, so draft POST/PATCH are never replayed
+    adapter = HTTPAdapter(
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    return session
+
+
+def _use_cookies(cookies: list):
+    """Install cookies as the shared session's auth headers.
+
+    Every later API call then carries them without rebuilding any headers.
+    """
+    headers = _http().headers
+    headers.pop("x-xsrftoken", None)  # Don't keep a token from an older login
+    headers.update(cookie_auth(cookies))
+
+
 def verify_login(cookies: list) -> bool:
-    """Check if saved cookies are still valid."""
-    try:
-        import requests
-    except ImportError:
+    """Check if saved cookies are still valid (and make them the session's auth)."""
+    if requests is None:
         _print("错误: requests 未安装。请运行: pip install requests")
         sys.exit(1)
 
+    _use_cookies(cookies)
+
     try:
-        resp = requests.get(
-            "https://www.zhihu.com/api/v4/me",
-            headers={
-                "Cookie": cookies_to_header(cookies),
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            },
-            timeout=10,
-        )
+        resp = _http().get("https://www.zhihu.com/api/v4/me", timeout=10)
         if resp.status_code == 200:
             data = resp.json()
             name = data.get("name", "Unknown")
@@ -266,23 +342,20 @@ def verify_login(cookies: list) -> bool:
     return False
 
 
-def create_draft(cookies: list, title: str, content: str) -> str | None:
-    """Create a new article draft on Zhihu, return draft ID."""
-    import requests
+# Per-request headers on top of the session's auth; requests adds
+# Content-Type itself for json= bodies
+_DRAFT_HEADERS = {
+    "Referer": "https://zhuanlan.zhihu.com/write",
+    "Origin": "https://zhuanlan.zhihu.com",
+}
 
-    xsrf = get_xsrf_token(cookies)
-    headers = {
-        "Cookie": cookies_to_header(cookies),
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Referer": "https://zhuanlan.zhihu.com/write",
-        "Origin": "https://zhuanlan.zhihu.com",
-    }
-    if xsrf:
-        headers["x-xsrftoken"] = xsrf
+
+def create_draft(title: str, content: str) -> str | None:
+    """Create a new article draft on Zhihu, return draft ID."""
+    headers = _DRAFT_HEADERS
 
     # Step 1: Create empty draft
-    resp = requests.post(
+    resp = _http().post(
         "https://zhuanlan.zhihu.com/api/articles/drafts",
         headers=headers,
         json={"title": title, "delta_time": 0},
@@ -303,7 +376,7 @@ def create_draft(cookies: list, title: str, content: str) -> str | None:
     _print(f"草稿已创建: ID={draft_id}")
 
     # Step 2: Update draft with content
-    resp2 = requests.patch(
+    resp2 = _http().patch(
         f"https://zhuanlan.zhihu.com/api/articles/{draft_id}/draft",
         headers=headers,
         json={
@@ -323,28 +396,24 @@ def create_draft(cookies: list, title: str, content: str) -> str | None:
     return draft_id
 
 
-def publish_draft(cookies: list, draft_id: str, topic_names: list[str] | None = None) -> str | None:
+def publish_draft(draft_id: str, topic_names: list[str] | None = None) -> str | None:
     """Publish a draft article on Zhihu, return article URL."""
-    import requests
-
-    xsrf = get_xsrf_token(cookies)
     headers = {
-        "Cookie": cookies_to_header(cookies),
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         "Referer": f"https://zhuanlan.zhihu.com/p/{draft_id}/edit",
         "Origin": "https://zhuanlan.zhihu.com",
     }
-    if xsrf:
-        headers["x-xsrftoken"] = xsrf
 
-    # Resolve topic IDs if topic names provided
+    # Resolve topic IDs if topic names provided; the lookups are independent,
+    # so uncached ones run side by side instead of one round-trip after another
     topic_ids = []
     if topic_names:
-        for name in topic_names:
-            tid = search_topic(cookies, name.strip())
-            if tid:
-                topic_ids.append(tid)
+        names = [name.strip() for name in topic_names]
+        if sum(name not in _topic_ids for name in names) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(names), 8)) as ex:
+                found = list(ex.map(search_topic, names))
+        else:
+            found = [search_topic(name) for name in names]
+        topic_ids = [tid for tid in found if tid]
 
     publish_data = {
         "column": None,
@@ -355,7 +424,7 @@ def publish_draft(cookies: list, draft_id: str, topic_names: list[str] | None =
     if topic_ids:
         publish_data["topic_ids"] = topic_ids
 
-    resp = requests.put(
+    resp = _http().put(
         f"https://zhuanlan.zhihu.com/api/articles/{draft_id}/publish",
         headers=headers,
         json=publish_data,
@@ -371,26 +440,32 @@ def publish_draft(cookies: list, draft_id: str, topic_names: list[str] | None =
     return article_url
 
 
-def search_topic(cookies: list, keyword: str) -> str | None:
-    """Search for a Zhihu topic and return its ID."""
-    import requests
+# Topic keyword -> ID (None when Zhihu has no such topic). Topic IDs are
+# global, so a batch resolves each keyword once instead of once per article
+_topic_ids: dict[str, str | None] = {}
+
 
+def search_topic(keyword: str) -> str | None:
+    """Search for a Zhihu topic and return its ID."""
+    if keyword in _topic_ids:
+        return _topic_ids[keyword]
     try:
-        resp = requests.get(
+        resp = _http().get(
             "https://www.zhihu.com/api/v4/search/suggest",
             params={"q": keyword, "t": "topic"},
-            headers={
-                "Cookie": cookies_to_header(cookies),
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            },
             timeout=10,
         )
         if resp.status_code == 200:
             data = resp.json()
             suggest = data.get("suggest", [])
+            topic_id = None
             for item in suggest:
                 if item.get("type") == "topic":
-                    return str(item.get("id", ""))
+                    topic_id = str(item.get("id", ""))
+                    break
+            # Only answered lookups are remembered; errors are retried next time
+            _topic_ids[keyword] = topic_id
+            return topic_id
     except Exception:
         pass
     return None
@@ -434,7 +509,10 @@ def publish_via_browser(md_path: Path, title: str, html_content: str, draft: boo
         "https://zhuanlan.zhihu.com/write",
     ])
 
-    time.sleep(5)
+    if _wait_for_debug_port(debug_port) is None:
+        _print("连接浏览器失败")
+        chrome_proc.kill()
+        return False
 
     with sync_playwright() as p:
         browser = None
@@ -541,15 +619,20 @@ def publish_via_browser(md_path: Path, title: str, html_content: str, draft: boo
 # Main Publish Flow
 # ──────────────────────────────────────────────
 
+_TITLE_RE = re.compile(r"#\s+(.+)")
+# From the first non-whitespace character to the end of its line
+_FIRST_LINE_RE = re.compile(r"\S[^\n]*")
+
+
 def extract_title(md_text: str) -> str:
     """Extract title from first h1 heading."""
-    match = re.match(r"^#\s+(.+)", md_text, re.MULTILINE)
+    match = _TITLE_RE.match(md_text)
     if match:
         return match.group(1).strip()
-    for line in md_text.split("\n"):
-        line = line.strip()
-        if line:
-            return line[:100]
+    # Fall back to the first non-blank line without splitting the whole text
+    match = _FIRST_LINE_RE.search(md_text)
+    if match:
+        return match.group().strip()[:100]
     return "Untitled"
 
 
@@ -567,51 +650,96 @@ def _ensure_login() -> list:
         if not login():
             sys.exit(1)
         cookies = load_cookies()
+        _use_cookies(cookies)
 
     return cookies
 
 
-def publish_article(
-    md_file: str,
-    title: str | None = None,
-    draft: bool = False,
-    topics: list[str] | None = None,
-) -> bool:
-    """Main publish flow: convert markdown and publish to Zhihu. Returns True on success."""
+@functools.lru_cache(maxsize=256)
+def _convert_markdown(md_content: str) -> str:
+    """Convert markdown to Zhihu HTML, memoized on the markdown text.
+
+    convert is imported here rather than at module level: it exits the
+    process when markdown/bs4 are missing, which would break --login.
+    """
+    from convert import convert_to_zhihu_content
+    return convert_to_zhihu_content(md_content)
+
+
+def prepare_article(md_file: str, title: str | None = None) -> dict | None:
+    """Read and convert a markdown file without touching the network.
+
+    Returns a dict with path, title and html_content, or None on failure.
+    """
     md_path = Path(md_file)
     if not md_path.exists():
         _print(f"错误: 文件不存在: {md_path}")
-        return False
+        return None
 
-    md_content = md_path.read_text(encoding="utf-8")
+    # Whole-file read without TextIOWrapper; CRLF is folded by hand since
+    # that was the only newline translation read_text() did for us
+    md_content = md_path.read_bytes().decode("utf-8").replace("\r\n", "\n")
 
     # Extract title
     if not title:
         title = extract_title(md_content)
-    _print(f"文章标题: {title}")
 
     # Convert markdown to Zhihu HTML
     try:
-        from convert import convert_to_zhihu_content
-        html_content = convert_to_zhihu_content(md_content)
+        html_content = _convert_markdown(md_content)
     except ImportError:
         _print("错误: 无法导入 convert 模块，请确认 convert.py 存在")
+        return None
+
+    return {"path": md_path, "title": title, "html_content": html_content}
+
+
+def publish_article(
+    md_file: str,
+    title: str | None = None,
+    draft: bool = False,
+    topics: list[str] | None = None,
+    cookies: list | None = None,
+) -> bool:
+    """Main publish flow: convert markdown and publish to Zhihu. Returns True on success."""
+    article = prepare_article(md_file, title)
+    if article is None:
         return False
+    return publish_prepared(article, draft, topics, cookies)
 
-    cookies = _ensure_login()
+
+def publish_prepared(
+    article: dict,
+    draft: bool = False,
+    topics: list[str] | None = None,
+    cookies: list | None = None,
+) -> bool:
+    """Publish an article returned by prepare_article. Returns True on success.
+
+    cookies: already verified by _ensure_login (batch mode); skips checking
+    the login again for this article.
+    """
+    md_path = article["path"]
+    title = article["title"]
+    html_content = article["html_content"]
+    _print(f"文章标题: {title}")
+
+    if cookies is None:
+        _ensure_login()
 
     # Try API-based publishing first
     _print("正在通过 API 发布...")
     try:
-        import requests
-        draft_id = create_draft(cookies, title, html_content)
+        if requests is None:
+            raise ImportError("requests")
+        draft_id = create_draft(title, html_content)
         if draft_id:
             if draft:
                 _print(f"文章已保存为草稿！")
                 _print(f"编辑链接: https://zhuanlan.zhihu.com/p/{draft_id}/edit")
                 return True
             else:
-                url = publish_draft(cookies, draft_id, topics)
+                url = publish_draft(draft_id, topics)
                 if url:
                     _print(f"文章发布成功！")
                     _print(f"文章链接: {url}")
@@ -628,6 +756,14 @@ def publish_article(
     return publish_via_browser(md_path, title, html_content, draft)
 
 
+def _prepare_for_batch(md_file: Path) -> tuple[dict | None, str | None]:
+    """prepare_article for the batch converter thread: (article, error message)."""
+    try:
+        return prepare_article(str(md_file)), None
+    except Exception as e:
+        return None, str(e)
+
+
 def batch_publish(
     dir_path: str,
     draft: bool = False,
@@ -640,14 +776,15 @@ def batch_publish(
         dir_path: Directory containing .md files
         draft: If True, save as drafts instead of publishing
         topics: Optional topic tags for all articles
-        delay: Seconds to wait between publishes (default 60s to avoid rate limiting)
+        delay: Seconds between the starts of consecutive publishes (default 60s
+            to avoid rate limiting)
     """
     folder = Path(dir_path)
     if not folder.is_dir():
         _print(f"错误: 目录不存在: {folder}")
         sys.exit(1)
 
-    md_files = sorted(folder.glob("*.md"))
+    md_files = _list_markdown_files(folder)
     if not md_files:
         _print(f"目录下没有找到 .md 文件: {folder}")
         sys.exit(1)
@@ -661,30 +798,49 @@ def batch_publish(
     _print(f"发布间隔: {delay}s")
     _print(f"=" * 50)
 
-    # Verify login once before batch
-    _ensure_login()
+    # Convert on a background thread so each article's conversion overlaps
+    # with login and earlier publishes; map() still yields in file order
+    converter = ThreadPoolExecutor(max_workers=1)
+    try:
+        articles = converter.map(_prepare_for_batch, md_files)
 
-    success_list = []
-    fail_list = []
+        # Verify login once for the whole batch
+        cookies = _ensure_login()
 
-    for idx, md_file in enumerate(md_files, 1):
-        _print(f"\n[{idx}/{total}] {md_file.name}")
-        _print("-" * 40)
+        success_list = []
+        fail_list = []
+        last_start = None
 
-        try:
-            ok = publish_article(str(md_file), title=None, draft=draft, topics=topics)
-            if ok:
-                success_list.append(md_file.name)
-            else:
+        for idx, (md_file, (article, error)) in enumerate(zip(md_files, articles), 1):
+            _print(f"\n[{idx}/{total}] {md_file.name}")
+            _print("-" * 40)
+            if article is None:
+                if error:
+                    _print(f"转换出错: {error}")
                 fail_list.append(md_file.name)
-        except Exception as e:
-            _print(f"发布出错: {e}")
-            fail_list.append(md_file.name)
+                continue
+
+            # Publishes start `delay` seconds apart; time spent publishing
+            # counts toward the gap instead of being added to it
+            if last_start is not None:
+                remaining = last_start + delay - time.monotonic()
+                if remaining > 0:
+                    _print(f"等待 {remaining:.0f}s 后继续...")
+                    time.sleep(remaining)
+            last_start = time.monotonic()
 
-        # Delay between publishes to avoid rate limiting (skip after last)
-        if idx < total:
-            _print(f"等待 {delay}s 后继续...")
-            time.sleep(delay)
+            try:
+                ok = publish_prepared(article, draft=draft, topics=topics, cookies=cookies)
+                if ok:
+                    success_list.append(md_file.name)
+                else:
+                    fail_list.append(md_file.name)
+            except Exception as e:
+                _print(f"发布出错: {e}")
+                fail_list.append(md_file.name)
+    finally:
+        # Don't keep converting files nobody will publish (e.g. login aborted)
+        converter.shutdown(cancel_futures=True)
 
     # Summary
     _print(f"\n{'=' * 50}")
@@ -702,15 +858,32 @@ def batch_publish(
 # Utilities
 # ──────────────────────────────────────────────
 
+def _list_markdown_files(dir_path: Path) -> list[Path]:
+    """Sorted .md files directly inside dir_path.
+
+    os.scandir hands back names and cached file types in one pass; the bare
+    names are sorted (normcase keeps Windows' case-insensitive order) and
+    only then joined into Path objects.
+    """
+    with os.scandir(dir_path) as it:
+        names = [e.name for e in it if e.name.endswith(".md") and e.is_file()]
+    names.sort(key=os.path.normcase)
+    return [dir_path / name for name in names]
+
+
+# UTF-8 stdout for Windows consoles, opened once (closefd=False keeps the
+# real stdout open when this handle is collected)
+try:
+    _OUT = open(sys.stdout.fileno(), "w", encoding="utf-8", errors="replace",
+                buffering=1, closefd=False)
+except Exception:
+    _OUT = None
+
+
 def _print(msg: str):
     """Print with UTF-8 encoding for Windows compatibility."""
-    import io
     try:
-        out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace", line_buffering=True)
-        out.write(msg + "\n")
-        out.flush()
-        # Detach to avoid closing stdout
-        out.detach()
+        _OUT.write(msg + "\n")
     except Exception:
         print(msg)
 